@@ -0,0 +1,112 @@
+# benchmarks/chunking.py
+"""
+Chunk Counts, Sizes and Padding Waste of Chunking Settings
+
+Each setting chunks the whole corpus. A random sample of its chunks is
+embedded to measure padding waste and throughput, from which the time to
+embed the corpus is estimated. The three-sentence chunks used before the
+token-budgeted chunker are included as a baseline. The configured setting
+is also timed with its chunk manifests, cold and warm.
+
+Run from backend/: python -m benchmarks.chunking
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.chunker import Chunker, chunk_stats
+from src.document_loader import DocumentLoader, iter_sentences
+from src.embeddings import Embeddings
+from src.initialize import load_config
+
+from .common import write_report
+
+NUM_CHUNKS = 512
+SETTINGS = [(64, 0), (128, 0), (128, 32), (256, 0), (256, 64)]
+
+
+def three_sentence_chunks(blocks):
+    sentences = list(iter_sentences(blocks))
+    return [" ".join(sentences[i : i + 3]) for i in range(0, len(sentences), 3)]
+
+
+def main():
+    config = load_config()
+    loader = DocumentLoader(config["documents"]["directory"])
+    embeddings = Embeddings.from_config(config, os.getenv("HUGGINGFACE_API_KEY"))
+    chunking = config.get("chunking", {})
+
+    settings = [(None, None)] + SETTINGS
+    results = []
+    for target_tokens, overlap_tokens in settings:
+        start_time = time.perf_counter()
+        if target_tokens is None:
+            chunks = []
+            for _, blocks in loader.iter_documents():
+                chunks += three_sentence_chunks(blocks)
+            tokens = embeddings.chunker.count_tokens(chunks)
+        else:
+            chunker = Chunker(
+                embeddings.model_id,
+                target_tokens=target_tokens,
+                overlap_tokens=overlap_tokens,
+                tokenizer=embeddings.tokenizer,
+            )
+            chunks, tokens = [], []
+            for _, blocks in loader.iter_documents():
+                for chunk, text in chunker.chunk(blocks):
+                    chunks.append(text)
+                    tokens.append(chunk.tokens)
+        chunk_seconds = time.perf_counter() - start_time
+
+        rows = np.random.default_rng(0).choice(
+            len(chunks), min(NUM_CHUNKS, len(chunks)), replace=False
+        )
+        embeddings.tokens_encoded = embeddings.tokens_padded = 0
+        embeddings.encode([chunks[row] for row in rows])
+
+        results.append(
+            {
+                "chunking": (
+                    "3 sentences"
+                    if target_tokens is None
+                    else f"{target_tokens} tokens, {overlap_tokens} overlap"
+                ),
+                **chunk_stats(tokens, embeddings.max_length),
+                "chunk_seconds": chunk_seconds,
+                "padding_waste": embeddings.padding_waste,
+                "chunks_per_sec": embeddings.chunks_per_second,
+                "corpus_embed_seconds_est": len(chunks) / embeddings.chunks_per_second,
+            }
+        )
+
+    # Cold Run Writes the Manifests, Warm Run Only Slices the Text
+    chunker = Chunker.from_config(
+        config, os.getenv("HUGGINGFACE_API_KEY"), tokenizer=embeddings.tokenizer
+    )
+    with tempfile.TemporaryDirectory() as manifest_directory:
+        for run in ("manifest cold", "manifest warm"):
+            start_time = time.perf_counter()
+            count = sum(
+                1
+                for path in loader.paths()
+                for _ in chunker.chunk_file(path, manifest_directory)
+            )
+            results.append(
+                {
+                    "chunking": (
+                        f"{run}: {chunking.get('target_tokens', 128)} tokens, "
+                        f"{chunking.get('overlap_tokens', 0)} overlap"
+                    ),
+                    "chunks": count,
+                    "chunk_seconds": time.perf_counter() - start_time,
+                }
+            )
+
+    write_report("chunking", embeddings.model_id, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/common.py
+import json
+import os
+import time
+from typing import Callable, List, Tuple
+
+import faiss
+import numpy as np
+
+from src.document_loader import DocumentLoader
+from src.embeddings import Embeddings
+
+
+def load_corpus(config: dict) -> Tuple[Embeddings, np.ndarray, List[str]]:
+    """
+    Load or Generate Corpus Embeddings (Uses the Embedding Cache)
+
+    Args:
+        config (dict): Config Dict
+
+    Returns:
+        Tuple[Embeddings, np.ndarray, List[str]]:
+            Embeddings Object, Chunk Embeddings, Text Chunks
+    """
+    document_directory = config["documents"]["directory"]
+    loader = DocumentLoader(document_directory)
+
+    embeddings = Embeddings.from_config(config, os.getenv("HUGGINGFACE_API_KEY"))
+    matrix, chunks = embeddings.embed_documents(
+        loader.iter_documents(),
+        embedding_directory=os.path.join(document_directory, "embeddings"),
+    )
+
+    return embeddings, matrix, chunks
+
+
+def sample_queries(matrix: np.ndarray, n: int = 200, seed: int = 0) -> np.ndarray:
+    """
+    Sample Corpus Vectors to Use as Queries
+
+    Args:
+        matrix (np.ndarray): Corpus Embeddings
+        n (int, optional): Number of Queries. Defaults to 200.
+        seed (int, optional): Random Seed. Defaults to 0.
+
+    Returns:
+        np.ndarray: (n, dimension) Query Embeddings
+    """
+    rows = np.random.default_rng(seed).choice(
+        len(matrix), min(n, len(matrix)), replace=False
+    )
+    return np.ascontiguousarray(matrix[rows], dtype=np.float32)
+
+
+def ground_truth(matrix: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Exact Nearest Neighbours (Flat L2 Baseline)
+
+    Args:
+        matrix (np.ndarray): Corpus Embeddings
+        queries (np.ndarray): Query Embeddings
+        k (int): Neighbours per Query
+
+    Returns:
+        np.ndarray: (len(queries), k) Row Indices
+    """
+    index = faiss.IndexFlatL2(matrix.shape[1])
+    index.add(np.ascontiguousarray(matrix, dtype=np.float32))
+    return index.search(queries, k)[1]
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """
+    Fraction of True Neighbours Found
+
+    Args:
+        found (np.ndarray): (n, k) Returned Row Indices
+        truth (np.ndarray): (n, k) Exact Row Indices
+
+    Returns:
+        float: Recall@k
+    """
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def time_queries(search: Callable[[np.ndarray], np.ndarray], queries: np.ndarray):
+    """
+    Run Queries One at a Time and Time Each
+
+    Args:
+        search (Callable[[np.ndarray], np.ndarray]):
+            Takes a (1, dimension) Query, Returns (1, k) Row Indices
+        queries (np.ndarray): Query Embeddings
+
+    Returns:
+        Tuple[np.ndarray, dict]: (n, k) Row Indices, Latency Stats in ms
+    """
+    found, latencies = [], []
+
+    for query in queries:
+        start_time = time.perf_counter()
+        found.append(search(query.reshape(1, -1))[0])
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+    latencies = np.array(latencies)
+    stats = {
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+    return np.array(found), stats
+
+
+def write_report(name: str, model_id: str, results: List[dict]) -> str:
+    """
+    Save Benchmark Results under evals/
+
+    Args:
+        name (str): Benchmark Name
+        model_id (str): Embedding Model ID
+        results (List[dict]): One Dict per Configuration
+
+    Returns:
+        str: Report Path
+    """
+    output_directory = os.path.join("evals", "benchmarks")
+    os.makedirs(output_directory, exist_ok=True)
+
+    timestamp = int(time.time())
+    output_file = os.path.join(output_directory, f"{name}_{timestamp}.json")
+
+    with open(output_file, "w") as file:
+        json.dump({"model_id": model_id, "results": results}, file, indent=4)
+
+    for result in results:
+        print(result)
+    print(f"Report saved to {output_file}")
+
+    return output_file
@@ -0,0 +1,140 @@
+# benchmarks/embedding_models.py
+"""
+Retrieval Quality vs Speed and Size of Embedding Models
+
+Each model embeds the same chunks. Quality is measured without labels:
+one sentence of a sampled chunk is used as the query, and the chunk it
+came from should be ranked first.
+
+Run from backend/: python -m benchmarks.embedding_models [MODEL[:POOLING] ...]
+Defaults to the [model] id baseline and the configured [embeddings] model.
+All models are L2 normalized, so search ranks by cosine similarity.
+"""
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+from nltk.tokenize import sent_tokenize
+
+from src.chunker import Chunker
+from src.document_loader import DocumentLoader
+from src.embeddings import Embeddings
+from src.initialize import load_config
+
+from .common import time_queries, write_report
+
+K = 10
+NUM_QUERIES = 200
+
+
+def chunk_corpus(config: dict):
+    """
+    Chunk the Documents the Same Way as Embeddings.get_embeddings
+
+    Args:
+        config (dict): Config Dict
+
+    Returns:
+        List[str]: Chunk Texts
+    """
+    loader = DocumentLoader(config["documents"]["directory"])
+    chunker = Chunker.from_config(config, os.getenv("HUGGINGFACE_API_KEY"))
+
+    chunks = []
+    for _, blocks in loader.iter_documents():
+        chunks += [chunk for _, chunk in chunker.chunk(blocks)]
+    return chunks
+
+
+def sample_probes(chunks, n: int = NUM_QUERIES, seed: int = 0):
+    """
+    Pick One Sentence from Random Multi-Sentence Chunks
+
+    Args:
+        chunks (List[str]): Chunk Texts
+        n (int, optional): Number of Probes. Defaults to NUM_QUERIES.
+        seed (int, optional): Random Seed. Defaults to 0.
+
+    Returns:
+        Tuple[List[str], np.ndarray]: Probe Sentences, Source Chunk Rows
+    """
+    rng = np.random.default_rng(seed)
+    candidates = [i for i, chunk in enumerate(chunks) if len(sent_tokenize(chunk)) > 1]
+    rows = rng.choice(candidates, min(n, len(candidates)), replace=False)
+
+    probes = []
+    for row in rows:
+        sentences = sent_tokenize(chunks[row])
+        probes.append(sentences[rng.integers(len(sentences))])
+
+    return probes, rows
+
+
+def main():
+    config = load_config()
+    settings = config.get("embeddings", {})
+
+    models = sys.argv[1:] or [
+        f"{config['model']['id']}:mean",
+        f"{settings.get('model', config['model']['id'])}:{settings.get('pooling', 'mean')}",
+    ]
+
+    chunks = chunk_corpus(config)
+    probes, rows = sample_probes(chunks)
+
+    results = []
+    for model in dict.fromkeys(models):
+        model_id, _, pooling = model.partition(":")
+        embeddings = Embeddings(
+            model_id=model_id,
+            HUGGINGFACE_API_KEY=os.getenv("HUGGINGFACE_API_KEY"),
+            batch_size=settings.get("batch_size", 32),
+            pooling=pooling or "mean",
+            normalize=True,
+        )
+
+        parameters = sum(p.numel() for p in embeddings.model.parameters())
+
+        matrix = embeddings.encode(chunks)
+        chunks_per_second = embeddings.chunks_per_second
+
+        index = faiss.IndexFlatL2(embeddings.dimension)
+        index.add(matrix)
+
+        start_time = time.perf_counter()
+        query_matrix = embeddings.encode(probes, batch_size=1)
+        query_ms = (time.perf_counter() - start_time) * 1000 / len(probes)
+
+        found, latency = time_queries(
+            lambda query: index.search(query, K)[1], query_matrix
+        )
+        ranks = [
+            list(neighbours).index(row) + 1 if row in neighbours else None
+            for neighbours, row in zip(found, rows)
+        ]
+
+        results.append(
+            {
+                "model": model_id,
+                "pooling": embeddings.pooling,
+                "dimension": embeddings.dimension,
+                "parameters_m": parameters / 1e6,
+                "hit@1": sum(rank == 1 for rank in ranks) / len(ranks),
+                f"hit@{K}": sum(rank is not None for rank in ranks) / len(ranks),
+                "mrr": sum(1 / rank for rank in ranks if rank) / len(ranks),
+                "chunks_per_sec": chunks_per_second,
+                "query_embed_ms": query_ms,
+                "index_mb": matrix.nbytes / 2**20,
+                **latency,
+            }
+        )
+
+        del embeddings
+
+    write_report("embedding_models", ", ".join(models), results)
+
+
+if __name__ == "__main__":
+    main()
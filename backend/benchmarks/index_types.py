@@ -0,0 +1,73 @@
+# benchmarks/index_types.py
+"""
+Recall vs Latency of VectorStore Index Types against the Flat Baseline
+
+Run from backend/: python -m benchmarks.index_types
+"""
+import time
+
+import faiss
+
+from src.initialize import load_config
+from src.vector_store import VectorStore
+
+from .common import (
+    ground_truth,
+    load_corpus,
+    recall_at_k,
+    sample_queries,
+    time_queries,
+    write_report,
+)
+
+K = 10
+
+INDEX_CONFIGS = [
+    {"index": "flat"},
+    {"index": "ivf_flat", "nprobe": 1},
+    {"index": "ivf_flat", "nprobe": 8},
+    {"index": "ivf_flat", "nprobe": 32},
+    {"index": "ivf_pq", "nprobe": 8},
+    {"index": "ivf_pq", "nprobe": 32},
+    {"index": "hnsw", "ef_search": 16},
+    {"index": "hnsw", "ef_search": 64},
+    {"index": "hnsw", "ef_search": 128},
+]
+
+
+def main():
+    config = load_config()
+    embeddings, matrix, chunks = load_corpus(config)
+
+    queries = sample_queries(matrix)
+    truth = ground_truth(matrix, queries, K)
+
+    results = []
+    for overrides in INDEX_CONFIGS:
+        index_config = {**config.get("vector_store", {}), **overrides}
+
+        start_time = time.perf_counter()
+        vector_store = VectorStore(matrix.shape[1], index_config)
+        vector_store.add_documents(chunks, matrix)
+        build_seconds = time.perf_counter() - start_time
+
+        found, latency = time_queries(
+            lambda query: vector_store.index.search(query, K)[1], queries
+        )
+
+        results.append(
+            {
+                **overrides,
+                "vectors": vector_store.index.ntotal,
+                f"recall@{K}": recall_at_k(found, truth),
+                "build_sec": build_seconds,
+                "index_mb": faiss.serialize_index(vector_store.index).nbytes / 2**20,
+                **latency,
+            }
+        )
+
+    write_report("index_types", embeddings.model_id, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/inference_backends.py
+"""
+Throughput and fp32 Agreement of Embedding Inference Backends
+
+Run from backend/: python -m benchmarks.inference_backends
+"""
+import os
+
+from src.embeddings import Embeddings
+from src.inference import BACKENDS, cosine_agreement
+from src.initialize import load_config
+
+from .common import write_report
+from .embedding_models import chunk_corpus
+
+NUM_CHUNKS = 512
+
+
+def main():
+    config = load_config()
+    settings = config.get("embeddings", {})
+    chunks = chunk_corpus(config)[:NUM_CHUNKS]
+
+    results, baseline = [], None
+    for backend in BACKENDS:
+        embeddings = Embeddings.from_config(
+            {
+                **config,
+                "embeddings": {**settings, "backend": backend, "min_agreement": 0},
+            },
+            os.getenv("HUGGINGFACE_API_KEY"),
+        )
+
+        matrix = embeddings.encode(chunks)
+        if baseline is None:
+            baseline = matrix
+        agreement = cosine_agreement(baseline, matrix)
+
+        results.append(
+            {
+                "backend": backend,
+                "threads": settings.get("threads", 0),
+                "chunks": len(chunks),
+                "chunks_per_sec": embeddings.chunks_per_second,
+                "min_cosine": float(min(agreement)),
+                "mean_cosine": float(sum(agreement) / len(agreement)),
+            }
+        )
+
+        del embeddings
+
+    write_report(
+        "inference_backends", settings.get("model", config["model"]["id"]), results
+    )
+
+
+if __name__ == "__main__":
+    main()
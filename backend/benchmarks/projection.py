@@ -0,0 +1,86 @@
+# benchmarks/projection.py
+"""
+Recall, Memory and Latency of PCA / OPQ Projections before the Index
+
+Each projection is trained on the corpus inside the VectorStore index and
+queried with full-dimension vectors, as the RAG Agent would. Recall is
+measured against exact search on the full vectors.
+
+Run from backend/: python -m benchmarks.projection
+"""
+import math
+import time
+
+import faiss
+
+from src.initialize import load_config
+from src.vector_store import VectorStore
+
+from .common import (
+    ground_truth,
+    load_corpus,
+    recall_at_k,
+    sample_queries,
+    time_queries,
+    write_report,
+)
+
+K = 10
+
+INDEXES = ["flat", "hnsw"]
+
+# (Projection, Dimension Reduction Factor)
+PROJECTIONS = [("none", 1), ("pca", 2), ("pca", 4), ("pca", 8), ("opq", 4), ("opq", 8)]
+
+
+def main():
+    config = load_config()
+    embeddings, matrix, chunks = load_corpus(config)
+
+    queries = sample_queries(matrix)
+    truth = ground_truth(matrix, queries, K)
+    dimension = matrix.shape[1]
+
+    results = []
+    for index in INDEXES:
+        for projection, factor in PROJECTIONS:
+            projection_dimension = dimension // factor
+            index_config = {
+                **config.get("vector_store", {}),
+                "index": index,
+                "projection": projection,
+                "projection_dimension": projection_dimension,
+            }
+            if projection == "opq":
+                index_config["pq_m"] = math.gcd(
+                    index_config.get("pq_m", 64), projection_dimension
+                )
+
+            start_time = time.perf_counter()
+            vector_store = VectorStore(dimension, index_config)
+            vector_store.add_documents(chunks, matrix)
+            build_seconds = time.perf_counter() - start_time
+
+            found, latency = time_queries(
+                lambda query: vector_store.index.search(query, K)[1], queries
+            )
+
+            results.append(
+                {
+                    "index": index,
+                    "projection": projection,
+                    "dimension": projection_dimension,
+                    "vectors": vector_store.index.ntotal,
+                    f"recall@{K}": recall_at_k(found, truth),
+                    "build_sec": build_seconds,
+                    "index_mb": faiss.serialize_index(vector_store.index).nbytes
+                    / 2**20,
+                    **latency,
+                }
+            )
+
+    write_report("projection", embeddings.model_id, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/storage_precision.py
+"""
+Recall, Memory and Latency of Embedding Storage Precisions
+
+Vectors go through the cache and database encoding of each precision and
+are indexed with the matching codec, as initialize_rag_agent would. Recall
+is measured against exact float32 search.
+
+Run from backend/: python -m benchmarks.storage_precision
+"""
+import time
+
+import faiss
+
+from src.initialize import load_config
+from src.precision import PRECISIONS, decode_vectors, encode_vectors, row_bytes
+from src.vector_store import VectorStore
+
+from .common import (
+    ground_truth,
+    load_corpus,
+    recall_at_k,
+    sample_queries,
+    time_queries,
+    write_report,
+)
+
+K = 10
+
+
+def main():
+    config = load_config()
+    embeddings, matrix, chunks = load_corpus(config)
+
+    queries = sample_queries(matrix)
+    truth = ground_truth(matrix, queries, K)
+    dimension = matrix.shape[1]
+
+    results = []
+    for precision in PRECISIONS:
+        stored = decode_vectors(encode_vectors(matrix, precision), precision)
+        index_config = {**config.get("vector_store", {}), "precision": precision}
+
+        start_time = time.perf_counter()
+        vector_store = VectorStore(dimension, index_config)
+        vector_store.add_documents(chunks, stored)
+        build_seconds = time.perf_counter() - start_time
+
+        found, latency = time_queries(
+            lambda query: vector_store.index.search(query, K)[1], queries
+        )
+
+        results.append(
+            {
+                "precision": precision,
+                "index": index_config.get("index", "flat"),
+                "vectors": vector_store.index.ntotal,
+                f"recall@{K}": recall_at_k(found, truth),
+                "bytes_per_vector": row_bytes(dimension, precision),
+                "cache_mb": row_bytes(dimension, precision) * len(matrix) / 2**20,
+                "index_mb": faiss.serialize_index(vector_store.index).nbytes / 2**20,
+                "build_sec": build_seconds,
+                **latency,
+            }
+        )
+
+    write_report("storage_precision", embeddings.model_id, results)
+
+
+if __name__ == "__main__":
+    main()
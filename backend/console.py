@@ -21,14 +21,11 @@ def main():
     with open(f"config/config.{env}.toml", "r") as file:
         config = toml.load(file)
 
-    model_id = config["model"]["id"]
-
     # directory to load documents from
     document_directory = "data/test"
 
     # create document loader
     loader = DocumentLoader(document_directory)
-    titles, documents = loader.load_documents()
 
     # get embeddings for loaded documents
     HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
@@ -37,15 +34,16 @@ def main():
     embedding_directory = document_directory + "/embeddings"
 
     # generate or load embeddings
-    embeddings = Embeddings(model_id=model_id, HUGGINGFACE_API_KEY=HUGGINGFACE_API_KEY)
+    embeddings = Embeddings.from_config(config, HUGGINGFACE_API_KEY)
 
-    document_embeddings, chunked_texts_with_titles = embeddings.get_embeddings(
-        titles, documents, embedding_directory=embedding_directory
+    # documents are streamed, not loaded all at once
+    document_embeddings, chunked_texts_with_titles = embeddings.embed_documents(
+        loader.iter_documents(), embedding_directory=embedding_directory
     )
 
     # vector storage
     embedding_dimension = len(document_embeddings[0])
-    vector_store = VectorStore(dimension=embedding_dimension)
+    vector_store = VectorStore(embedding_dimension, config.get("vector_store"))
     vector_store.add_documents(chunked_texts_with_titles, document_embeddings)
 
     # retriever and llm
@@ -1,17 +1,25 @@
 # main.py
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import os
 import base64
+import json
+import time
 
-from src.initialize import initialize_rag_agent
-from src.document_loader import DocumentLoader
+from src.batcher import QueryBatcher
+from src.concurrency import AsyncLimiter, BoundedExecutor, QueueFullError
+from src.ingest import title_from_filename
+from src.initialize import get_ingest_pipeline, initialize_rag_agent, load_config
 
 app = FastAPI()
 
 
 class Query(BaseModel):
     text: str
+    session_id: str = None
+    # Title or File Name of One Document to Answer from
+    document: str = None
 
 
 class Response(BaseModel):
@@ -23,7 +31,64 @@ class FileUpload(BaseModel):
     content: str
 
 
-rag_agent = initialize_rag_agent()
+# Built at Startup, not Import: Ingest Readers are Spawned Processes, and
+# under python main.py each one Re-imports this Module as __mp_main__
+config = None
+rag_agent = None
+upload_directory = None
+ingest_pipeline = None
+retrieval_executor = None
+generation_limiter = None
+ingest_executor = None
+batcher = None
+
+
+@app.on_event("startup")
+def startup():
+    global config, rag_agent, upload_directory, ingest_pipeline
+    global retrieval_executor, generation_limiter, ingest_executor, batcher
+
+    config = load_config()
+    rag_agent = initialize_rag_agent()
+
+    # Uploads Update the Live Index One Document at a Time
+    upload_directory = config["documents"]["directory"]
+    ingest_pipeline = get_ingest_pipeline(config, rag_agent.retriever.embeddings)
+
+    # Blocking Stages Run off the Event Loop with Bounded Queues
+    retrieval_executor = BoundedExecutor(
+        "retrieval",
+        max_workers=config["server"]["retrieval_workers"],
+        max_queue=0,
+    )
+    generation_limiter = AsyncLimiter(
+        "generation",
+        max_concurrency=config["server"]["generation_concurrency"],
+        max_queue=config["server"]["max_queued_generations"],
+    )
+    ingest_executor = BoundedExecutor(
+        "ingest",
+        max_workers=config["server"]["ingest_workers"],
+        max_queue=config["server"]["max_queued_uploads"],
+    )
+
+    # Concurrent Queries Share Embedding Forward Passes and FAISS Searches
+    batcher = QueryBatcher(
+        rag_agent.retriever,
+        k=rag_agent.k,
+        max_batch_size=config["batching"]["max_batch_size"],
+        max_wait_ms=config["batching"]["max_wait_ms"],
+        max_queue=config["server"]["max_queued_queries"],
+        workers=config["server"]["retrieval_workers"],
+        executor=retrieval_executor,
+    )
+
+
+@app.on_event("shutdown")
+def shutdown():
+    # Answers Added since the Last Periodic Write
+    if rag_agent.answer_cache is not None:
+        rag_agent.answer_cache.save()
 
 
 @app.get("/")
@@ -31,66 +96,193 @@ async def root():
     return {"message": "Hello World"}
 
 
+@app.get("/stats")
+async def stats():
+    answer_cache = rag_agent.answer_cache
+    return {
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "query_embeddings": rag_agent.retriever.embeddings.query_cache.stats(),
+    }
+
+
+def document_scope(query: Query) -> str:
+    """
+    Title of the Document a Query is Limited to
+
+    Runs on the event loop, has_document reads a title set that updates
+    replace whole, so it never waits for an upload or delete.
+
+    Raises:
+        HTTPException: 404 if the Document is not Indexed
+
+    Returns:
+        str: Document Title, or None for all Documents
+    """
+    if query.document is None:
+        return None
+
+    title = title_from_filename(os.path.basename(query.document))
+    if not rag_agent.retriever.vector_store.has_document(title):
+        raise HTTPException(
+            status_code=404, detail=f"No document named {query.document}"
+        )
+    return title
+
+
 @app.post("/query", response_model=Response)
 async def query(query: Query):
+    document = document_scope(query)
+
     try:
-        answer = rag_agent.answer(query.text)
+        results = await batcher.retrieve(query.text, document)
+        async with generation_limiter:
+            answer = await rag_agent.aanswer(
+                query.text,
+                [result.text for result in results],
+                query.session_id,
+                [result.chunk_id for result in results],
+            )
         return Response(answer=answer)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/query/stream")
+async def query_stream(query: Query):
+    """
+    Stream the Answer as NDJSON Lines
+
+    Each token is sent as {"token": ...}. The last line is {"done": true}
+    with time to first token and total latency in seconds, or {"error": ...}.
+    """
+    start_time = time.perf_counter()
+
+    if generation_limiter.full():
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy: generation queue is full",
+            headers={"Retry-After": "1"},
+        )
+
+    document = document_scope(query)
+
+    try:
+        results = await batcher.retrieve(query.text, document)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    context = [result.text for result in results]
+    chunk_ids = [result.chunk_id for result in results]
+
+    async def stream():
+        time_to_first_token = None
+
+        try:
+            async with generation_limiter:
+                async for token in rag_agent.aanswer_stream(
+                    query.text, context, query.session_id, chunk_ids
+                ):
+                    if time_to_first_token is None:
+                        time_to_first_token = time.perf_counter() - start_time
+                    yield json.dumps({"token": token}) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+
+        total_time = time.perf_counter() - start_time
+        print(
+            f"Query streamed: time to first token {time_to_first_token or 0:.2f}s, "
+            f"total {total_time:.2f}s"
+        )
+        yield json.dumps(
+            {
+                "done": True,
+                "time_to_first_token": time_to_first_token,
+                "total_time": total_time,
+            }
+        ) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @app.post("/upload")
-async def upload(file: FileUpload, background_tasks: BackgroundTasks):
+async def upload(file: FileUpload):
     if not file.filename.endswith(".txt"):
         raise HTTPException(
             status_code=400,
             detail=f"Only .txt files are allowed. Received: {file.filename}",
         )
 
-    file_location = f"data/test/{file.filename}"
-    os.makedirs(os.path.dirname(file_location), exist_ok=True)
-    # Decode the base64 string back to bytes
-    file_content = base64.b64decode(file.content)
-    with open(file_location, "wb") as f:
-        f.write(file_content)
+    file_location = os.path.join(upload_directory, os.path.basename(file.filename))
 
-    # Add a background task to process the file after the response is sent
-    background_tasks.add_task(process_file, file_location, file.filename)
+    # Write and process the file on the ingest executor
+    try:
+        ingest_executor.submit(process_file, file_location, file.filename, file.content)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "5"}
+        )
 
     return {
         "info": f"File '{file.filename}' uploaded successfully. Processing will complete shortly."
     }
 
 
-async def process_file(file_location: str, filename: str):
+@app.delete("/documents/{filename}")
+async def delete(filename: str):
+    file_location = os.path.join(upload_directory, os.path.basename(filename))
+    if not filename.endswith(".txt") or not os.path.exists(file_location):
+        raise HTTPException(status_code=404, detail=f"No document named {filename}")
+
     try:
-        # Load the new document
-        loader = DocumentLoader(os.path.dirname(file_location))
-        new_titles, new_documents = loader.load_documents()
-
-        # Get embeddings for the new document
-        embeddings = rag_agent.retriever.embeddings
-        new_document_embeddings, new_chunked_texts_with_titles = (
-            embeddings.get_embeddings(
-                new_titles,
-                new_documents,
-                embedding_directory=os.path.join(
-                    os.path.dirname(file_location), "embeddings"
-                ),
-            )
+        ingest_executor.submit(delete_file, file_location, filename)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "5"}
         )
 
-        # Add the new document to the vector store
-        rag_agent.retriever.vector_store.add_documents(
-            new_chunked_texts_with_titles, new_document_embeddings
+    return {"info": f"File '{filename}' will be removed shortly."}
+
+
+def process_file(file_location: str, filename: str, content: str):
+    try:
+        os.makedirs(os.path.dirname(file_location), exist_ok=True)
+        # Decode the base64 string back to bytes
+        file_content = base64.b64decode(content)
+        with open(file_location, "wb") as f:
+            f.write(file_content)
+
+        # Embed only this document, replacing its previous version
+        changes = ingest_pipeline.update(
+            rag_agent.retriever.vector_store, file_location
         )
 
-        print(f"File '{filename}' processed and added to RAG agent")
+        print(
+            f"File '{filename}' processed: {changes['added']} chunks added, "
+            f"{changes['removed']} removed, {changes['kept']} unchanged"
+        )
     except Exception as e:
         print(f"Error processing file '{filename}': {str(e)}")
 
 
+def delete_file(file_location: str, filename: str):
+    try:
+        removed = ingest_pipeline.delete(
+            rag_agent.retriever.vector_store, file_location
+        )
+        print(f"File '{filename}' deleted: {removed} chunks removed")
+    except Exception as e:
+        print(f"Error deleting file '{filename}': {str(e)}")
+
+
 if __name__ == "__main__":
     import uvicorn
 
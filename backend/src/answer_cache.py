@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+
+
+def context_key(
+    chunk_ids: List[int], context: List[str], history: List[dict] = None
+) -> str:
+    """
+    Key for a Retrieved Context Set and Conversation
+
+    Chunk ids are stable per chunk but restart when the index is rebuilt
+    from scratch, so the chunk texts are hashed in as well. The answer also
+    depends on the conversation so far, which is hashed in too.
+
+    Args:
+        chunk_ids (List[int]): Retrieved Chunk IDs
+        context (List[str]): Retrieved Chunks
+        history (List[dict], optional): Session Messages Replayed with the
+            Prompt. Defaults to None, no History.
+
+    Returns:
+        str: Hex Digest
+    """
+    payload = json.dumps([list(map(int, chunk_ids)), list(context), history or []])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        max_size: int = 1024,
+        threshold: float = 0.99,
+        directory: str = None,
+        signature: dict = None,
+        save_interval_seconds: float = 60,
+    ):
+        """
+        Semantic Answer Cache
+
+        An answer is reused when a new query embedding has cosine similarity
+        of at least threshold with a cached query and the context key (the
+        retrieved chunks and the conversation) is the same. After an upload
+        changes retrieval the key differs, so the old answer is not served;
+        it ages out of the LRU order.
+
+        The threshold must be calibrated for the embedding model: mean-pooled
+        decoder states are anisotropic, unrelated queries can be above 0.95.
+
+        Args:
+            max_size (int, optional): Max Answers, Least Recently Used are
+                Evicted. Defaults to 1024.
+            threshold (float, optional): Min Cosine Similarity. Defaults to 0.99.
+            directory (str, optional): Persist Answers to this Directory.
+                Defaults to None (memory only).
+            signature (dict, optional): Embedding Settings, a Persisted Cache
+                with a Different Signature is Discarded. Defaults to None.
+            save_interval_seconds (float, optional): Min Seconds Between
+                Writes when Answers are Added, call save() at Shutdown.
+                Defaults to 60.
+        """
+        self.max_size = max_size
+        self.threshold = threshold
+        self.signature = signature or {}
+        self.save_interval = save_interval_seconds
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+        # Normalized Query Embeddings, one Row per Slot, Entries Point at
+        # their Slot and Slots at their Entry (-1 when Free)
+        self.matrix = None
+        self.slot_ids = np.full(max_size, -1, dtype=np.int64)
+        self.free_slots = list(range(max_size - 1, -1, -1))
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+
+    def _similar(self, embedding: np.ndarray) -> List[int]:
+        """
+        Entry IDs of Cached Queries at or Above the Threshold, Best First
+        """
+        if not self.entries:
+            return []
+
+        similarities = self.matrix @ embedding
+        slots = np.flatnonzero((similarities >= self.threshold) & (self.slot_ids >= 0))
+        slots = slots[np.argsort(-similarities[slots])]
+        return self.slot_ids[slots].tolist()
+
+    def _add(self, embedding: np.ndarray, key: str, answer: str):
+        """
+        Store an Entry, Evicting the Least Recently Used if Full
+        """
+        if self.matrix is None:
+            self.matrix = np.zeros((self.max_size, len(embedding)), dtype=np.float32)
+
+        if not self.free_slots:
+            _, evicted = self.entries.popitem(last=False)
+            self.slot_ids[evicted["slot"]] = -1
+            self.free_slots.append(evicted["slot"])
+
+        slot = self.free_slots.pop()
+        self.matrix[slot] = embedding
+        self.slot_ids[slot] = self.next_id
+        self.entries[self.next_id] = {"slot": slot, "key": key, "answer": answer}
+        self.next_id += 1
+
+    def get(self, embedding: np.ndarray, key: str) -> str:
+        """
+        Look Up an Answer
+
+        Args:
+            embedding (np.ndarray): Query Embedding
+            key (str): Context Key of the Retrieved Chunks
+
+        Returns:
+            str: Cached Answer, None on Miss
+        """
+        embedding = self._normalize(embedding)
+
+        with self.lock:
+            answer = None
+            for entry_id in self._similar(embedding):
+                entry = self.entries[entry_id]
+                if entry["key"] == key:
+                    answer = entry["answer"]
+                    self.entries.move_to_end(entry_id)
+                    break
+
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return answer
+
+    def put(self, embedding: np.ndarray, key: str, answer: str):
+        """
+        Cache an Answer
+
+        Args:
+            embedding (np.ndarray): Query Embedding
+            key (str): Context Key of the Retrieved Chunks
+            answer (str): LLM Answer
+        """
+        with self.lock:
+            self._add(self._normalize(embedding), key, answer)
+            self.dirty = True
+
+        if time.monotonic() - self.last_save >= self.save_interval:
+            self.save()
+
+    def clear(self):
+        """
+        Remove all Answers
+        """
+        with self.lock:
+            self.entries.clear()
+            self.slot_ids[:] = -1
+            self.free_slots = list(range(self.max_size - 1, -1, -1))
+            self.dirty = True
+        self.save()
+
+    def stats(self) -> dict:
+        """
+        Hit and Miss Counters
+
+        Returns:
+            dict: size, hits, misses and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self):
+        """
+        Write Answers to Disk, if a Directory is Set and they Changed
+        """
+        if not self.directory:
+            return
+
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                entries = [
+                    {**entry, "embedding": self.matrix[entry["slot"]].copy()}
+                    for entry in self.entries.values()
+                ]
+                self.dirty = False
+                self.last_save = time.monotonic()
+            self._write(entries)
+
+    def _write(self, entries: List[dict]):
+        """
+        Write Entries Beside the Cache Files, then Swap them in
+
+        Args:
+            entries (List[dict]): Cache Entries, Oldest First
+        """
+        answers_path = os.path.join(self.directory, "answers.json")
+        embeddings_path = os.path.join(self.directory, "embeddings.npy")
+
+        with open(embeddings_path + ".tmp", "wb") as file:
+            if entries:
+                np.save(file, np.stack([entry["embedding"] for entry in entries]))
+            else:
+                np.save(file, np.zeros((0, 0), dtype=np.float32))
+        with open(answers_path + ".tmp", "w") as file:
+            json.dump(
+                {
+                    "signature": self.signature,
+                    "entries": [
+                        {"key": entry["key"], "answer": entry["answer"]}
+                        for entry in entries
+                    ],
+                },
+                file,
+            )
+
+        os.replace(embeddings_path + ".tmp", embeddings_path)
+        os.replace(answers_path + ".tmp", answers_path)
+
+    def load(self):
+        """
+        Read Answers Saved by save()
+        """
+        answers_path = os.path.join(self.directory, "answers.json")
+        embeddings_path = os.path.join(self.directory, "embeddings.npy")
+        if not (os.path.exists(answers_path) and os.path.exists(embeddings_path)):
+            return
+
+        with open(answers_path, "r") as file:
+            saved = json.load(file)
+
+        if saved.get("signature", {}) != self.signature:
+            print(
+                f"Answer cache {answers_path} was built with another model, discarding"
+            )
+            return
+
+        embeddings = np.load(embeddings_path)
+        if len(embeddings) != len(saved["entries"]):
+            print(f"Answer cache {answers_path} is inconsistent, discarding")
+            return
+
+        entries = saved["entries"][-self.max_size :]
+        for embedding, entry in zip(embeddings[-len(entries) :], entries):
+            self._add(embedding, entry["key"], entry["answer"])
+
+        print(f"Loaded {len(self.entries)} cached answers from {self.directory}")
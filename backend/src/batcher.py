@@ -0,0 +1,118 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import List
+
+from .concurrency import QueueFullError
+from .retriever import Retriever
+from .vector_store import SearchResult
+
+
+class QueryBatcher:
+    def __init__(
+        self,
+        retriever: Retriever,
+        k: int = 2,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5,
+        max_queue: int = 0,
+        workers: int = 1,
+        executor: Executor = None,
+    ):
+        """
+        Micro-Batch Concurrent Retrieval Requests
+
+        Queries arriving within max_wait_ms of the first waiting query (up
+        to max_batch_size) are embedded in one forward pass and searched
+        with one FAISS call, then each caller's future is resolved.
+
+        Args:
+            retriever (Retriever): Retriever Object
+            k (int, optional): Chunks per Query. Defaults to 2.
+            max_batch_size (int, optional): Max Queries per Batch. Defaults to 16.
+            max_wait_ms (float, optional): Max Wait to Fill a Batch. Defaults to 5.
+            max_queue (int, optional): Max Waiting Queries, 0 for no Limit.
+                Defaults to 0.
+            workers (int, optional): Batches Run at Once. Defaults to 1.
+            executor (Executor, optional): Executor Batches Run on. Defaults to
+                the event loop's default executor.
+        """
+        self.retriever = retriever
+        self.k = k
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.num_workers = workers
+        self.executor = executor
+        self.queue = None
+        self.workers = []
+
+    async def retrieve(self, query: str, document: str = None) -> List[SearchResult]:
+        """
+        Queue Query and Wait for its Batch
+
+        Args:
+            query (str): User Query
+            document (str, optional): Document Title to Search within.
+                Defaults to None, all Documents.
+
+        Raises:
+            QueueFullError: Too Many Queries Waiting
+
+        Returns:
+            List[SearchResult]: Chunk IDs, Distances and Chunks
+        """
+        # Queue and Workers Belong to the Running Event Loop
+        if not self.workers or any(worker.done() for worker in self.workers):
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+            self.workers = [
+                asyncio.create_task(self.run()) for _ in range(self.num_workers)
+            ]
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((query, document, future))
+        except asyncio.QueueFull:
+            raise QueueFullError("retrieval queue is full")
+
+        return await future
+
+    async def run(self):
+        """
+        Collect Batches and Run them Until Cancelled
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            queries = [query for query, _, _ in batch]
+            documents = [document for _, document, _ in batch]
+
+            try:
+                results = await loop.run_in_executor(
+                    self.executor,
+                    self.retriever.retrieve_batch,
+                    queries,
+                    self.k,
+                    documents,
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, _, future), result in zip(batch, results):
+                # Caller may have Gone Away
+                if not future.done():
+                    future.set_result(result)
@@ -0,0 +1,264 @@
+import json
+import os
+import re
+from typing import Iterator, List, Tuple, Union
+
+import numpy as np
+
+# "{title}_Chunk_{number}: {text}"
+LABEL = re.compile(r"(.*?)_Chunk_(\d+): ", re.DOTALL)
+
+# Dead Bytes in the In-Memory Tail Before it is Compacted
+COMPACT_BYTES = 16 * 2**20
+
+
+class ChunkStore:
+    """Chunk Labels Stored as Offsets into One Text Blob"""
+
+    def __init__(self):
+        """
+        Compact Store of "{title}_Chunk_{number}: {text}" Labels
+
+        Each chunk is a row of NumPy arrays (title id, chunk number, start
+        and end byte offset) into a UTF-8 blob of chunk texts. Titles are
+        stored once. A loaded blob is memory-mapped, chunks added later
+        are kept in memory after it. Labels are only built when read. Text
+        of removed or replaced chunks is dropped from the in-memory part
+        once it adds up to COMPACT_BYTES, and from the blob on save.
+
+        The store compares equal to a list of its labels.
+        """
+        self.titles = []
+        self.title_ids = {}
+        self.title = np.zeros(0, dtype=np.int32)
+        self.number = np.zeros(0, dtype=np.int32)
+        self.start = np.zeros(0, dtype=np.int64)
+        self.end = np.zeros(0, dtype=np.int64)
+        self.blob = np.zeros(0, dtype=np.uint8)
+        self.tail = bytearray()
+        self.dead_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def __getitem__(self, row: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+
+        text = self.text(row)
+        title = self.title[row]
+        if title < 0:
+            return text
+        return f"{self.titles[title]}_Chunk_{self.number[row]}: {text}"
+
+    def __setitem__(self, row: int, label: str):
+        title, number, text = self.parse(label)
+        self.title[row], self.number[row] = title, number
+        if text != self.text(row):
+            self.dead_bytes += self.tail_bytes([row])
+            self.start[row], self.end[row] = self.append_text(text)
+            self.compact()
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ChunkStore, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def text(self, row: int) -> str:
+        """
+        Chunk Text without Title
+
+        Args:
+            row (int): Row
+
+        Returns:
+            str: Chunk Text
+        """
+        start, end = int(self.start[row]), int(self.end[row])
+        if start >= len(self.blob):
+            start, end = start - len(self.blob), end - len(self.blob)
+            return self.tail[start:end].decode("utf-8")
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+    def intern(self, title: str) -> int:
+        if title not in self.title_ids:
+            self.title_ids[title] = len(self.titles)
+            self.titles.append(title)
+        return self.title_ids[title]
+
+    def parse(self, label: str) -> Tuple[int, int, str]:
+        """
+        Split a Label into Title ID, Chunk Number and Text
+
+        Labels without a title are kept whole, with title ID -1.
+
+        Args:
+            label (str): "{title}_Chunk_{number}: {text}"
+
+        Returns:
+            Tuple[int, int, str]: Title ID, Chunk Number, Text
+        """
+        match = LABEL.match(label)
+        if match is None:
+            return -1, 0, label
+        return self.intern(match[1]), int(match[2]), label[match.end() :]
+
+    def append_text(self, text: str) -> Tuple[int, int]:
+        start = len(self.blob) + len(self.tail)
+        self.tail += text.encode("utf-8")
+        return start, len(self.blob) + len(self.tail)
+
+    def extend(self, labels: List[str]):
+        """
+        Add Chunks
+
+        Args:
+            labels (List[str]): Chunk Labels
+        """
+        n = len(labels)
+        title = np.empty(n, dtype=np.int32)
+        number = np.empty(n, dtype=np.int32)
+        start = np.empty(n, dtype=np.int64)
+        end = np.empty(n, dtype=np.int64)
+
+        for row, label in enumerate(labels):
+            title[row], number[row], text = self.parse(label)
+            start[row], end[row] = self.append_text(text)
+
+        self.title = np.concatenate([self.title, title])
+        self.number = np.concatenate([self.number, number])
+        self.start = np.concatenate([self.start, start])
+        self.end = np.concatenate([self.end, end])
+
+    def keep(self, rows: np.ndarray):
+        """
+        Keep Only the Given Rows, in Order
+
+        Text of dropped rows stays in the blob until the next save.
+
+        Args:
+            rows (np.ndarray): Row Indices or Boolean Mask
+        """
+        dropped = np.ones(len(self), dtype=bool)
+        dropped[rows] = False
+        self.dead_bytes += self.tail_bytes(np.flatnonzero(dropped))
+
+        self.title = self.title[rows]
+        self.number = self.number[rows]
+        self.start = self.start[rows]
+        self.end = self.end[rows]
+        self.compact()
+
+    def tail_bytes(self, rows: np.ndarray) -> int:
+        """
+        Bytes of the Given Rows' Text Held in the In-Memory Tail
+
+        Args:
+            rows (np.ndarray): Row Indices
+
+        Returns:
+            int: Byte Count
+        """
+        in_tail = self.start[rows] >= len(self.blob)
+        return int((self.end[rows] - self.start[rows])[in_tail].sum())
+
+    def compact(self, min_dead_bytes: int = COMPACT_BYTES):
+        """
+        Rewrite the In-Memory Tail with Live Text Only
+
+        Args:
+            min_dead_bytes (int, optional): Only Compact once this many
+                Bytes are Dead, and at Least Half the Tail. Defaults to
+                COMPACT_BYTES.
+        """
+        if self.dead_bytes < max(min_dead_bytes, len(self.tail) // 2):
+            return
+
+        offset = len(self.blob)
+        tail = bytearray()
+        for row in np.flatnonzero(self.start >= offset):
+            start, end = int(self.start[row]) - offset, int(self.end[row]) - offset
+            self.start[row] = offset + len(tail)
+            tail += self.tail[start:end]
+            self.end[row] = offset + len(tail)
+
+        self.tail = tail
+        self.dead_bytes = 0
+
+    def document_rows(self, title: str) -> np.ndarray:
+        """
+        Rows of One Document
+
+        Args:
+            title (str): Document Title
+
+        Returns:
+            np.ndarray: Row Indices, in Order
+        """
+        if title not in self.title_ids:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.title == self.title_ids[title])
+
+    def save(self, directory: str):
+        """
+        Write the Blob (Live Text Only) and Arrays
+
+        Args:
+            directory (str): Snapshot Directory
+        """
+        start = np.empty_like(self.start)
+        end = np.empty_like(self.end)
+
+        # Replaced, not Overwritten, as the Old Blob may be Mapped
+        blob_path = os.path.join(directory, "chunks.bin")
+        with open(blob_path + ".tmp", "wb") as file:
+            offset = 0
+            for row in range(len(self)):
+                data = self.text(row).encode("utf-8")
+                file.write(data)
+                start[row], end[row] = offset, offset + len(data)
+                offset += len(data)
+        os.replace(blob_path + ".tmp", blob_path)
+
+        np.savez(
+            os.path.join(directory, "chunks.npz"),
+            title=self.title,
+            number=self.number,
+            start=start,
+            end=end,
+        )
+        with open(os.path.join(directory, "titles.json"), "w") as file:
+            json.dump(self.titles, file)
+
+    @classmethod
+    def load(cls, directory: str) -> "ChunkStore":
+        """
+        Load Arrays and Memory-Map the Blob
+
+        Args:
+            directory (str): Snapshot Directory
+
+        Returns:
+            ChunkStore: Chunk Store
+        """
+        store = cls()
+
+        with np.load(os.path.join(directory, "chunks.npz")) as arrays:
+            store.title = arrays["title"]
+            store.number = arrays["number"]
+            store.start = arrays["start"]
+            store.end = arrays["end"]
+
+        with open(os.path.join(directory, "titles.json"), "r") as file:
+            store.titles = json.load(file)
+        store.title_ids = {title: idx for idx, title in enumerate(store.titles)}
+
+        blob_path = os.path.join(directory, "chunks.bin")
+        if os.path.getsize(blob_path) > 0:
+            store.blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+
+        return store
@@ -0,0 +1,372 @@
+import functools
+import hashlib
+import json
+import os
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+from transformers import AutoTokenizer
+
+from .document_loader import BLOCK_SIZE, iter_sentence_spans, read_blocks
+
+# Bump when the Manifest Layout or Packing Changes
+MANIFEST_VERSION = 1
+
+# Sentences Tokenized Together
+TOKENIZE_BATCH = 256
+
+
+class Chunk(NamedTuple):
+    """Chunk Span in a Document"""
+
+    start: int
+    end: int
+    tokens: int
+
+
+@functools.lru_cache(maxsize=None)
+def load_tokenizer(model_id: str, HUGGINGFACE_API_KEY: str = None):
+    """
+    Load a (Fast) Tokenizer Once per Process
+
+    Args:
+        model_id (str): Model ID or Local Path
+        HUGGINGFACE_API_KEY (str, optional): Huggingface API Key
+
+    Returns:
+        PreTrainedTokenizerFast: Tokenizer
+    """
+    return AutoTokenizer.from_pretrained(model_id, token=HUGGINGFACE_API_KEY)
+
+
+def content_hash(path: str, block_size: int = BLOCK_SIZE) -> str:
+    """
+    SHA-256 of a File's Bytes
+
+    Args:
+        path (str): File Path
+        block_size (int, optional): Bytes Read at a Time. Defaults to 64K.
+
+    Returns:
+        str: Hex Digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TextWindow:
+    """Blocks Passing Through, Kept Until Released, so Spans can be Sliced"""
+
+    def __init__(self, blocks: Iterable[str]):
+        self.blocks = blocks
+        self.text = ""
+        self.offset = 0
+
+    def __iter__(self) -> Iterator[str]:
+        for block in self.blocks:
+            self.text += block
+            yield block
+
+    def slice(self, start: int, end: int) -> str:
+        return self.text[start - self.offset : end - self.offset]
+
+    def release(self, before: int):
+        """
+        Drop Text Before an Offset
+        """
+        if before > self.offset:
+            self.text = self.text[before - self.offset :]
+            self.offset = before
+
+
+class Chunker:
+    def __init__(
+        self,
+        model_id: str,
+        HUGGINGFACE_API_KEY: str = None,
+        target_tokens: int = 128,
+        overlap_tokens: int = 0,
+        tokenizer=None,
+    ):
+        """
+        Pack Sentences into Chunks of about target_tokens Tokens
+
+        Sentences are counted with the embedding model's tokenizer and
+        added to a chunk until the next one would pass the target. A
+        sentence longer than the target is split on token boundaries. A
+        chunk's text is the document text between its first and last
+        sentence, so a chunk is fully described by its offsets.
+
+        Args:
+            model_id (str): Embedding Model ID or Local Path (Tokenizer)
+            HUGGINGFACE_API_KEY (str, optional): Huggingface API Key
+            target_tokens (int, optional): Max Tokens per Chunk, Excluding
+                Special Tokens. Defaults to 128.
+            overlap_tokens (int, optional): Trailing Sentences of up to this
+                many Tokens are Repeated at the Start of the Next Chunk.
+                Defaults to 0.
+            tokenizer (optional): Already Loaded Tokenizer for model_id.
+                Defaults to loading it on first use.
+        """
+        if not 0 <= overlap_tokens < target_tokens:
+            raise ValueError(
+                "overlap_tokens must be at least 0 and below target_tokens"
+            )
+
+        self.model_id = model_id
+        self.HUGGINGFACE_API_KEY = HUGGINGFACE_API_KEY
+        self.target_tokens = target_tokens
+        self.overlap_tokens = overlap_tokens
+        self._tokenizer = tokenizer
+
+    @classmethod
+    def from_config(cls, config: dict, HUGGINGFACE_API_KEY: str = None, **kwargs):
+        """
+        Create a Chunker from the TOML [chunking] Settings
+
+        Tokens are counted with the [embeddings] model, or [model] id.
+
+        Args:
+            config (dict): Config Dict
+            HUGGINGFACE_API_KEY (str, optional): Huggingface API Key
+
+        Returns:
+            Chunker: Chunker
+        """
+        settings = config.get("chunking", {})
+        model_id = config.get("embeddings", {}).get("model", config["model"]["id"])
+
+        return cls(
+            model_id,
+            HUGGINGFACE_API_KEY,
+            target_tokens=settings.get("target_tokens", 128),
+            overlap_tokens=settings.get("overlap_tokens", 0),
+            **kwargs,
+        )
+
+    def __getstate__(self) -> dict:
+        # Sent to Ingest Workers, which Load their Own Tokenizer
+        return {**self.__dict__, "_tokenizer": None}
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = load_tokenizer(self.model_id, self.HUGGINGFACE_API_KEY)
+        return self._tokenizer
+
+    @property
+    def settings(self) -> dict:
+        """
+        Settings that Determine the Chunks
+
+        Returns:
+            dict: Tokenizer and Chunk Sizes
+        """
+        return {
+            "version": MANIFEST_VERSION,
+            "model_id": self.model_id,
+            "target_tokens": self.target_tokens,
+            "overlap_tokens": self.overlap_tokens,
+        }
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """
+        Tokens per Text, without Special Tokens
+
+        Args:
+            texts (List[str]): Texts
+
+        Returns:
+            List[int]: Token Counts
+        """
+        if not texts:
+            return []
+        return [
+            len(ids)
+            for ids in self.tokenizer(texts, add_special_tokens=False, verbose=False)[
+                "input_ids"
+            ]
+        ]
+
+    def split_sentence(self, start: int, sentence: str) -> Iterator[Chunk]:
+        """
+        Split a Sentence Longer than the Target on Token Boundaries
+
+        Args:
+            start (int): Sentence Offset in the Document
+            sentence (str): Sentence Text
+
+        Yields:
+            Chunk: Pieces of at most target_tokens Tokens
+        """
+        offsets = self.tokenizer(
+            sentence,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False,
+        )["offset_mapping"]
+
+        for first in range(0, len(offsets), self.target_tokens):
+            piece = offsets[first : first + self.target_tokens]
+            yield Chunk(start + piece[0][0], start + piece[-1][1], len(piece))
+
+    def pack(self, spans: Iterable[Tuple[int, int, str]]) -> Iterator[Chunk]:
+        """
+        Pack Sentences into Chunks
+
+        A chunk's token count is the sum over its sentences.
+
+        Args:
+            spans (Iterable[Tuple[int, int, str]]): Sentence Offsets and
+                Text, e.g. from iter_sentence_spans
+
+        Yields:
+            Chunk: Chunk Spans, in Order
+        """
+        # Sentence Spans of the Current Chunk, the First `carried` Repeated
+        group, total, carried = [], 0, 0
+
+        def batches():
+            batch = []
+            for span in spans:
+                batch.append(span)
+                if len(batch) == TOKENIZE_BATCH:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        for batch in batches():
+            counts = self.count_tokens([sentence for _, _, sentence in batch])
+
+            for (start, end, sentence), tokens in zip(batch, counts):
+                if tokens > self.target_tokens:
+                    if len(group) > carried:
+                        yield Chunk(group[0][0], group[-1][1], total)
+                    group, total, carried = [], 0, 0
+                    yield from self.split_sentence(start, sentence)
+                    continue
+
+                if total + tokens > self.target_tokens and len(group) > carried:
+                    yield Chunk(group[0][0], group[-1][1], total)
+
+                    # Repeat Trailing Sentences, Never the Whole Chunk
+                    overlap, overlap_total = [], 0
+                    for span in reversed(group[1:]):
+                        if overlap_total + span[2] > self.overlap_tokens:
+                            break
+                        overlap.insert(0, span)
+                        overlap_total += span[2]
+                    group, total = overlap, overlap_total
+
+                # Drop Overlap that Leaves no Room
+                while group and total + tokens > self.target_tokens:
+                    total -= group.pop(0)[2]
+                carried = len(group)
+
+                group.append((start, end, tokens))
+                total += tokens
+
+        if len(group) > carried:
+            yield Chunk(group[0][0], group[-1][1], total)
+
+    def chunk(self, blocks: Iterable[str]) -> Iterator[Tuple[Chunk, str]]:
+        """
+        Split Streamed Text into Chunks
+
+        Args:
+            blocks (Iterable[str]): Consecutive Blocks of One Document
+
+        Yields:
+            Tuple[Chunk, str]: Chunk Span and Text, in Order
+        """
+        window = TextWindow(blocks)
+        for chunk in self.pack(iter_sentence_spans(window)):
+            yield chunk, window.slice(chunk.start, chunk.end)
+            window.release(chunk.start)
+
+    def manifest_path(self, directory: str, digest: str) -> str:
+        key = hashlib.sha256(
+            json.dumps([self.settings, digest], sort_keys=True).encode()
+        ).hexdigest()
+        return os.path.join(directory, key + ".json")
+
+    def chunk_file(
+        self, path: str, manifest_directory: str = None
+    ) -> Iterator[Tuple[Chunk, str]]:
+        """
+        Split a File into Chunks, Reusing its Manifest
+
+        The manifest lists chunk offsets and token counts and is keyed by
+        the file's content hash and the chunk settings. With a manifest,
+        the text is only sliced, sentences are not split or tokenized.
+
+        Args:
+            path (str): Document Path
+            manifest_directory (str, optional): Manifest Directory. Defaults
+                to None, no manifest.
+
+        Yields:
+            Tuple[Chunk, str]: Chunk Span and Text, in Order
+        """
+        if manifest_directory is None:
+            yield from self.chunk(read_blocks(path))
+            return
+
+        manifest_path = self.manifest_path(manifest_directory, content_hash(path))
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as file:
+                chunks = [Chunk(*chunk) for chunk in json.load(file)["chunks"]]
+
+            window = TextWindow(read_blocks(path))
+            blocks = iter(window)
+            for chunk in chunks:
+                while window.offset + len(window.text) < chunk.end:
+                    if next(blocks, None) is None:
+                        break
+                yield chunk, window.slice(chunk.start, chunk.end)
+                window.release(chunk.start)
+            return
+
+        chunks = []
+        for chunk, text in self.chunk(read_blocks(path)):
+            chunks.append(chunk)
+            yield chunk, text
+
+        os.makedirs(manifest_directory, exist_ok=True)
+        with open(manifest_path + ".tmp", "w") as file:
+            json.dump({"settings": self.settings, "chunks": chunks}, file)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def chunk_stats(tokens: List[int], max_tokens: int = None) -> dict:
+    """
+    Chunk Size Statistics
+
+    Args:
+        tokens (List[int]): Tokens per Chunk
+        max_tokens (int, optional): Model Max Length, Longer Chunks are
+            Truncated. Defaults to None.
+
+    Returns:
+        dict: Chunk Count and Token Count Distribution
+    """
+    if not tokens:
+        return {"chunks": 0}
+
+    tokens = np.asarray(tokens)
+    stats = {
+        "chunks": len(tokens),
+        "tokens": int(tokens.sum()),
+        "mean_tokens": float(tokens.mean()),
+        "p50_tokens": float(np.percentile(tokens, 50)),
+        "max_tokens": int(tokens.max()),
+        "min_tokens": int(tokens.min()),
+    }
+    if max_tokens is not None:
+        stats["truncated"] = int((tokens > max_tokens).sum())
+    return stats
@@ -0,0 +1,138 @@
+import asyncio
+import contextlib
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when a Stage has no Free Worker or Queue Slot"""
+
+
+class BoundedExecutor(Executor):
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        """
+        Thread Pool that Rejects Work Instead of Queueing Without Limit
+
+        Args:
+            name (str): Stage Name (Thread Prefix, Error Messages)
+            max_workers (int): Concurrent Jobs
+            max_queue (int): Jobs Allowed to Wait for a Worker
+        """
+        self.name = name
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self.slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        """
+        Submit Job if a Slot is Free
+
+        Raises:
+            QueueFullError: All Workers Busy and Queue Full
+
+        Returns:
+            Future: Job Future
+        """
+        if not self.slots.acquire(blocking=False):
+            raise QueueFullError(f"{self.name} queue is full")
+
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class AsyncLimiter:
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        """
+        Bound Concurrent Coroutines, Rejecting Callers Once the Queue Fills
+
+        Use as "async with limiter:".
+
+        Args:
+            name (str): Stage Name (Error Messages)
+            max_concurrency (int): Coroutines Allowed Inside at Once
+            max_queue (int): Coroutines Allowed to Wait
+        """
+        self.name = name
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_pending = max_concurrency + max_queue
+        self.pending = 0
+
+    def full(self) -> bool:
+        """
+        Whether a New Caller would be Rejected
+
+        Returns:
+            bool: No Free Slot or Queue Place
+        """
+        return self.pending >= self.max_pending
+
+    async def __aenter__(self):
+        if self.full():
+            raise QueueFullError(f"{self.name} queue is full")
+
+        self.pending += 1
+        try:
+            await self.semaphore.acquire()
+        except BaseException:
+            self.pending -= 1
+            raise
+
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.semaphore.release()
+        self.pending -= 1
+
+
+class ReadWriteLock:
+    def __init__(self):
+        """
+        Many Readers or One Writer
+
+        Use as "with lock.read():" or "with lock.write():". Waiting writers
+        hold off new readers, so a stream of searches can not starve an
+        update. Not reentrant.
+        """
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+
+    @contextlib.contextmanager
+    def read(self):
+        with self.condition:
+            while self.writer or self.waiting_writers:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if self.readers == 0:
+                    self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        with self.condition:
+            self.waiting_writers += 1
+            while self.writer or self.readers:
+                self.condition.wait()
+            self.waiting_writers -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writer = False
+                self.condition.notify_all()
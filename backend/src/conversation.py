@@ -0,0 +1,107 @@
+from typing import List
+
+from .ttl_cache import TTLCache
+
+DEFAULT_SESSION = "default"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate Prompt Tokens without the Server's Tokenizer
+
+    LLaMA tokenizers average about four characters per token on English
+    text, plus a few tokens of chat template per message.
+
+    Args:
+        text (str): Message Content
+
+    Returns:
+        int: Approximate Token Count
+    """
+    return len(text) // 4 + 4
+
+
+class ConversationStore:
+    def __init__(
+        self,
+        max_history_tokens: int = 1024,
+        max_sessions: int = 1000,
+        session_ttl_seconds: float = 3600,
+    ):
+        """
+        Per-Session Chat History with a Token Budget
+
+        Each session keeps only the most recent whole turns (user and
+        assistant message) that fit in max_history_tokens, so the prompt
+        sent per request stays bounded however long the server runs.
+        Idle sessions expire and the least recently used are evicted.
+
+        Args:
+            max_history_tokens (int, optional): History Tokens Replayed per
+                Request. Defaults to 1024.
+            max_sessions (int, optional): Sessions Kept. Defaults to 1000.
+            session_ttl_seconds (float, optional): Idle Seconds Before a
+                Session is Dropped. Defaults to 3600.
+        """
+        self.max_history_tokens = max_history_tokens
+        self.sessions = TTLCache(max_sessions, session_ttl_seconds)
+
+    def get_history(self, session_id: str = None) -> List[dict]:
+        """
+        Get Session History
+
+        Args:
+            session_id (str, optional): Session ID. Defaults to the shared
+                default session.
+
+        Returns:
+            List[dict]: User and Assistant Messages, Oldest First
+        """
+        turns = self.sessions.get(session_id or DEFAULT_SESSION, [])
+        return [message for turn in turns for message in turn]
+
+    def get_messages(
+        self, session_id: str, system_message: dict, prompt: str
+    ) -> List[dict]:
+        """
+        Build Chat Messages for a Request
+
+        Args:
+            session_id (str): Session ID, None for the Default Session
+            system_message (dict): System Message
+            prompt (str): New User Prompt
+
+        Returns:
+            List[dict]: System Message, Session History, then the Prompt
+        """
+        return (
+            [system_message]
+            + self.get_history(session_id)
+            + [{"role": "user", "content": prompt}]
+        )
+
+    def append(self, session_id: str, prompt: str, response: str):
+        """
+        Record a Turn and Drop the Oldest Turns Past the Token Budget
+
+        Args:
+            session_id (str): Session ID, None for the Default Session
+            prompt (str): User Prompt
+            response (str): Assistant Response
+        """
+        session_id = session_id or DEFAULT_SESSION
+        turn = (
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": response},
+        )
+        turns = self.sessions.get(session_id, []) + [turn]
+
+        # Newest Turns First
+        kept, tokens = [], 0
+        for turn in reversed(turns):
+            tokens += sum(estimate_tokens(message["content"]) for message in turn)
+            if tokens > self.max_history_tokens:
+                break
+            kept.append(turn)
+
+        self.sessions.put(session_id, kept[::-1])
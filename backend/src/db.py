@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from psycopg2.pool import ThreadedConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_config: dict, max_connections: int = 8) -> ThreadedConnectionPool:
+    """
+    Get Shared Connection Pool for a Database Config
+
+    Args:
+        db_config (dict): Database Config Dict
+        max_connections (int, optional): Pool Size. Defaults to 8.
+
+    Returns:
+        ThreadedConnectionPool: Pool Shared by all Callers with the Same Config
+    """
+    key = tuple(sorted(db_config.items()))
+
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ThreadedConnectionPool(1, max_connections, **db_config)
+        return _pools[key]
+
+
+def chunk_hash(chunk_text: str) -> str:
+    """
+    Chunk Content Hash, Matches Postgres md5(chunk_text)
+
+    Args:
+        chunk_text (str): Chunk Text
+
+    Returns:
+        str: Hex Digest
+    """
+    return hashlib.md5(chunk_text.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def connection(db_config: dict):
+    """
+    Borrow a Pooled Connection for One Transaction
+
+    Commits when the block exits cleanly and rolls back on error.
+
+    Args:
+        db_config (dict): Database Config Dict
+
+    Yields:
+        connection: psycopg2 Connection
+    """
+    pool = get_pool(db_config)
+    conn = pool.getconn()
+
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
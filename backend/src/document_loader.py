@@ -1,8 +1,86 @@
+import hashlib
 import os
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple
 
 import psycopg2
 from dotenv import load_dotenv
+from nltk.tokenize import sent_tokenize
+
+
+BLOCK_SIZE = 1 << 16
+
+
+def read_blocks(path: str, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """
+    Read a Text File in Blocks
+
+    The file is opened when iteration starts and closed when it ends.
+
+    Args:
+        path (str): File Path
+        block_size (int, optional): Characters per Block. Defaults to 64K.
+
+    Yields:
+        str: Next Block of Text
+    """
+    with open(path, "r") as file:
+        while block := file.read(block_size):
+            yield block
+
+
+def iter_sentence_spans(blocks: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+    """
+    Split Streamed Text into Sentences with their Character Offsets
+
+    The last sentence of each buffer may continue in the next block, so
+    its raw text is carried over and tokenized again with what follows.
+    Gives the same sentences as sent_tokenize over the whole text.
+
+    Args:
+        blocks (Iterable[str]): Consecutive Blocks of One Document
+
+    Yields:
+        Tuple[int, int, str]: Start and End Offset in the Document, Sentence
+    """
+    carry, offset = "", 0
+
+    for block in blocks:
+        buffer = carry + block
+        sentences = sent_tokenize(buffer)
+        if not sentences:
+            carry = buffer
+            continue
+
+        # Sentences are Slices of the Buffer, in Order
+        position = 0
+        for sentence in sentences[:-1]:
+            start = buffer.find(sentence, position)
+            position = start + len(sentence)
+            yield offset + start, offset + position, sentence
+
+        # Keep the Raw Tail
+        tail = buffer.rfind(sentences[-1])
+        carry, offset = buffer[tail:], offset + tail
+
+    position = 0
+    for sentence in sent_tokenize(carry):
+        start = carry.find(sentence, position)
+        position = start + len(sentence)
+        yield offset + start, offset + position, sentence
+
+
+def iter_sentences(blocks: Iterable[str]) -> Iterator[str]:
+    """
+    Split Streamed Text into Sentences
+
+    Args:
+        blocks (Iterable[str]): Consecutive Blocks of One Document
+
+    Yields:
+        str: Sentences, in Order
+    """
+    for _, _, sentence in iter_sentence_spans(blocks):
+        yield sentence
 
 
 class DocumentLoader:
@@ -44,6 +122,56 @@ class DocumentLoader:
 
         return titles, documents
 
+    def iter_documents(
+        self, block_size: int = BLOCK_SIZE
+    ) -> Iterator[Tuple[str, Iterator[str]]]:
+        """
+        Lazily Yield Local Documents, Sorted by File Name
+
+        No file is read until its blocks are iterated, so only one block
+        of one document is in memory at a time.
+
+        Args:
+            block_size (int, optional): Characters per Block. Defaults to 64K.
+
+        Yields:
+            Tuple[str, Iterator[str]]: Title, Blocks of Text
+        """
+        for path in self.paths():
+            title = os.path.basename(path).split(".txt")[0].replace("_", " ")
+            yield title, read_blocks(path, block_size)
+
+    def paths(self) -> List[str]:
+        """
+        Paths of Local Documents, Sorted by File Name
+
+        Returns:
+            List[str]: .txt File Paths
+        """
+        return [
+            os.path.join(self.directory, filename)
+            for filename in sorted(os.listdir(self.directory))
+            if filename.endswith(".txt")
+        ]
+
+    def fingerprint(self) -> str:
+        """
+        Fingerprint of Local Documents from File Metadata (No Reads)
+
+        Returns:
+            str: Hex Digest over Name, Size and Modification Time of each File
+        """
+        digest = hashlib.sha256()
+
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith(".txt"):
+                stat = os.stat(os.path.join(self.directory, filename))
+                digest.update(
+                    f"{filename}:{stat.st_size}:{stat.st_mtime_ns}\n".encode()
+                )
+
+        return digest.hexdigest()
+
     def load_db_config(self) -> dict:
         """
         Load Database Config
@@ -97,7 +225,9 @@ class DocumentLoader:
             CREATE TABLE IF NOT EXISTS chunks (
                 id SERIAL PRIMARY KEY,
                 document_id INTEGER REFERENCES documents(id),
-                chunk_text TEXT
+                chunk_text TEXT,
+                chunk_hash TEXT,
+                position INTEGER
             )
         """
         )
@@ -107,11 +237,89 @@ class DocumentLoader:
             """
             CREATE TABLE IF NOT EXISTS embeddings (
                 id SERIAL PRIMARY KEY,
-                chunk_id INTEGER REFERENCES chunks(id),
-                embedding BYTEA
+                chunk_id INTEGER UNIQUE REFERENCES chunks(id),
+                embedding BYTEA,
+                signature TEXT
+            )
+        """
+        )
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+        self.migrate_db()
+
+    def migrate_db(self):
+        """
+        Migrate Database to Current Schema (Idempotent)
+
+        Adds and backfills chunks.chunk_hash, adds embeddings.signature (left
+        NULL on older rows, so they are re-embedded), removes duplicate chunks
+        and embeddings, backfills chunks.position (in id order, until the
+        document is ingested again), then creates the lookup indexes.
+        """
+        conn = psycopg2.connect(**self.db_config)
+        cursor = conn.cursor()
+
+        # Backfill Chunk Content Hash
+        cursor.execute("ALTER TABLE chunks ADD COLUMN IF NOT EXISTS chunk_hash TEXT")
+        cursor.execute(
+            "UPDATE chunks SET chunk_hash = md5(chunk_text) WHERE chunk_hash IS NULL"
+        )
+
+        # Embedding Signature Hash (NULL Never Matches the Current Model)
+        cursor.execute("ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS signature TEXT")
+
+        # Keep the Oldest of any Duplicate Embeddings and Chunks
+        cursor.execute(
+            """
+            DELETE FROM embeddings e USING embeddings d
+            WHERE e.chunk_id = d.chunk_id AND e.id > d.id
+        """
+        )
+        cursor.execute(
+            """
+            DELETE FROM embeddings WHERE chunk_id IN (
+                SELECT c.id FROM chunks c JOIN chunks d
+                ON c.document_id = d.document_id
+                AND c.chunk_hash = d.chunk_hash AND c.id > d.id
             )
         """
         )
+        cursor.execute(
+            """
+            DELETE FROM chunks c USING chunks d
+            WHERE c.document_id = d.document_id
+            AND c.chunk_hash = d.chunk_hash AND c.id > d.id
+        """
+        )
+
+        # Backfill Chunk Position in its Document
+        cursor.execute("ALTER TABLE chunks ADD COLUMN IF NOT EXISTS position INTEGER")
+        cursor.execute(
+            """
+            UPDATE chunks c SET position = r.position FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY document_id ORDER BY id
+                ) - 1 AS position FROM chunks
+            ) r WHERE c.id = r.id AND c.position IS NULL
+        """
+        )
+
+        # Unique (document_id, chunk_hash) also Serves document_id Lookups
+        cursor.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS chunks_document_id_chunk_hash_key
+            ON chunks (document_id, chunk_hash)
+        """
+        )
+        cursor.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS embeddings_chunk_id_key
+            ON embeddings (chunk_id)
+        """
+        )
 
         conn.commit()
         cursor.close()
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+from typing import List
+
+import numpy as np
+
+from .precision import check_precision, decode_vectors, encode_vectors, row_bytes
+
+# Matrix File Suffix per Stored Precision
+SUFFIXES = {"float32": "f32", "float16": "f16", "int8": "i8"}
+
+
+class EmbeddingStore:
+    """Memory-Mapped Embedding Cache"""
+
+    def __init__(
+        self,
+        directory: str,
+        signature: dict = None,
+        name: str = "embeddings",
+        precision: str = "float32",
+    ):
+        """
+        Single-File Embedding Cache
+
+        Embeddings are stored as rows of one contiguous matrix file, opened
+        with np.memmap. A sidecar keys file holds one chunk key per line,
+        where line i maps to row i. Both files are append-only.
+
+        Args:
+            directory (str): Cache Directory
+            signature (dict, optional): Settings that Produced the Embeddings
+                (model, pooling). A cache written with a different signature
+                is discarded. Defaults to None.
+            name (str, optional): Cache File Name. Defaults to "embeddings".
+            precision (str, optional): Stored Precision, "float32", "float16"
+                or "int8" (Scalar Quantized per Vector). Rows are returned
+                as float32. Defaults to "float32".
+        """
+        check_precision(precision)
+        os.makedirs(directory, exist_ok=True)
+        self.matrix_paths = {
+            other: os.path.join(directory, f"{name}.{suffix}")
+            for other, suffix in SUFFIXES.items()
+        }
+        self.matrix_path = self.matrix_paths[precision]
+        self.keys_path = os.path.join(directory, f"{name}.keys")
+        self.meta_path = os.path.join(directory, f"{name}.json")
+
+        self.lock = threading.Lock()
+        self.signature = signature or {}
+        self.precision = precision
+        self.dimension = None
+        self.keys = {}
+        self.matrix = np.zeros((0, 0), dtype=np.uint8)
+        self._keys_bytes = 0
+
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def load(self):
+        """
+        Load Keys and Memory-Map Matrix
+        """
+        if not os.path.exists(self.meta_path):
+            return
+
+        with open(self.meta_path, "r") as file:
+            meta = json.load(file)
+
+        # Reject Embeddings Produced by a Different Model or Pooling
+        if (
+            meta.get("signature", {}) != self.signature
+            or meta.get("precision", "float32") != self.precision
+        ):
+            print(
+                f"Embedding cache {self.meta_path} was built with "
+                f"{meta.get('signature')} in {meta.get('precision', 'float32')}, "
+                "discarding"
+            )
+            self.clear()
+            return
+
+        self.dimension = meta["dimension"]
+
+        keys = []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "rb") as file:
+                for line in file:
+                    # Ignore Partially Written Trailing Key
+                    if not line.endswith(b"\n"):
+                        break
+                    keys.append(line)
+
+        # Matrix and Keys Agree on the Shorter of the Two
+        rows = 0
+        if os.path.exists(self.matrix_path):
+            rows = os.path.getsize(self.matrix_path) // self.row_bytes
+        keys = keys[:rows]
+
+        self.keys = {key[:-1].decode("utf-8"): row for row, key in enumerate(keys)}
+        self._keys_bytes = sum(len(key) for key in keys)
+        self._map(len(keys))
+
+    def clear(self):
+        """
+        Remove Cache Files, Including Matrices of Other Precisions
+        """
+        for path in (*self.matrix_paths.values(), self.keys_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+        self.dimension = None
+        self.keys = {}
+        self.matrix = np.zeros((0, 0), dtype=np.uint8)
+        self._keys_bytes = 0
+
+    @property
+    def row_bytes(self) -> int:
+        return row_bytes(self.dimension, self.precision)
+
+    def _map(self, rows: int):
+        """
+        Memory-Map the First Rows of the Matrix File
+
+        Args:
+            rows (int): Number of Valid Rows
+        """
+        if rows == 0:
+            self.matrix = np.zeros((0, self.row_bytes), dtype=np.uint8)
+        else:
+            self.matrix = np.memmap(
+                self.matrix_path,
+                dtype=np.uint8,
+                mode="r",
+                shape=(rows, self.row_bytes),
+            )
+
+    def get(self, keys: List[str]) -> np.ndarray:
+        """
+        Get Embeddings for Keys
+
+        Args:
+            keys (List[str]): Chunk Keys (Must be Present)
+
+        Returns:
+            np.ndarray: (len(keys), dimension) float32 Embeddings
+        """
+        rows = [self.keys[key] for key in keys]
+        if not rows:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        return decode_vectors(self.matrix[rows], self.precision)
+
+    def append(self, keys: List[str], embeddings: np.ndarray):
+        """
+        Append Embeddings to Cache
+
+        New rows are written to the end of the matrix file, existing rows
+        are never rewritten. Keys already in the cache are skipped.
+
+        Args:
+            keys (List[str]): Chunk Keys
+            embeddings (np.ndarray): (len(keys), dimension) Embeddings
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+
+        with self.lock:
+            rows, new_keys, seen = [], [], set()
+            for row, key in enumerate(keys):
+                if key not in self.keys and key not in seen:
+                    seen.add(key)
+                    rows.append(row)
+                    new_keys.append(key)
+
+            if not new_keys:
+                return
+
+            if self.dimension is None:
+                self.dimension = embeddings.shape[1]
+                with open(self.meta_path, "w") as file:
+                    json.dump(
+                        {
+                            "dimension": self.dimension,
+                            "signature": self.signature,
+                            "precision": self.precision,
+                        },
+                        file,
+                    )
+
+            start = len(self.keys)
+
+            # Matrix First, so Keys Never Point Past the End of the Matrix
+            with open(self.matrix_path, "ab") as file:
+                file.truncate(start * self.row_bytes)
+                file.write(encode_vectors(embeddings[rows], self.precision).tobytes())
+
+            key_lines = "".join(f"{key}\n" for key in new_keys).encode("utf-8")
+            with open(self.keys_path, "ab") as file:
+                file.truncate(self._keys_bytes)
+                file.write(key_lines)
+
+            self._keys_bytes += len(key_lines)
+            for offset, key in enumerate(new_keys):
+                self.keys[key] = start + offset
+
+            self._map(len(self.keys))
@@ -1,45 +1,246 @@
+import hashlib
+import json
 import os
-from typing import List, Tuple
+import time
+import unicodedata
+from typing import Iterable, Iterator, List, Tuple
 
 import nltk
 import numpy as np
 import psycopg2
 import torch
 from dotenv import load_dotenv
-from nltk.tokenize import sent_tokenize
+from psycopg2.extras import execute_values
 from transformers import AutoModel, AutoTokenizer
 
+from .chunker import Chunker
+from .db import chunk_hash, connection
+from .embedding_store import EmbeddingStore
+from .inference import (
+    BACKENDS,
+    OnnxBackend,
+    TorchBackend,
+    TorchInt8Backend,
+    cosine_agreement,
+)
+from .precision import check_precision, decode_bytes, decode_vectors, encode_vectors
+from .ttl_cache import TTLCache
+
 try:
     nltk.find("punkt")
 except LookupError:
     nltk.download("punkt")
 
+# Texts a Non-Default Backend is Checked on Against fp32 Torch
+AGREEMENT_SAMPLE = [
+    "What is the main theme of the book Dracula?",
+    "Jonathan Harker travels to Transylvania to meet the Count.",
+    "Short text.",
+    "The green light at the end of Daisy's dock, a symbol of Gatsby's hopes "
+    "and dreams for the future, glows across the bay every night.",
+]
+
 
 class Embeddings:
     """Generate or Load Embeddings"""
 
-    def __init__(self, model_id: str, HUGGINGFACE_API_KEY: str, db_mode: bool = False):
+    def __init__(
+        self,
+        model_id: str,
+        HUGGINGFACE_API_KEY: str,
+        db_mode: bool = False,
+        batch_size: int = 32,
+        max_length: int = 512,
+        pooling: str = "mean",
+        normalize: bool = False,
+        query_cache_size: int = 1024,
+        query_cache_ttl_seconds: float = None,
+        backend: str = "torch",
+        threads: int = 0,
+        onnx_directory: str = os.path.join("models", "onnx"),
+        min_agreement: float = 0.99,
+        chunk_tokens: int = 128,
+        chunk_overlap_tokens: int = 0,
+        precision: str = "float32",
+    ):
         """
         Initialize Embeddings Object
 
+        Encoder sentence models (MiniLM, BGE) can be loaded from a local
+        directory by passing its path as model_id.
+
         Args:
-            model_id (str): Model ID to Generate Embeddings
+            model_id (str): Model ID or Local Path to Generate Embeddings
             HUGGINGFACE_API_KEY (str): Huggingface API Key
             db_mode (bool, optional): Database Mode. Defaults to False.
+            batch_size (int, optional): Chunks per Forward Pass. Defaults to 32.
+            max_length (int, optional): Max Tokens per Chunk. Defaults to 512.
+            pooling (str, optional): "mean" over tokens or the first ("cls")
+                token. Defaults to "mean".
+            normalize (bool, optional): L2 Normalize Embeddings, so L2 Search
+                Ranks by Cosine Similarity. Defaults to False.
+            query_cache_size (int, optional): Query Embeddings Memoized.
+                Defaults to 1024.
+            query_cache_ttl_seconds (float, optional): Idle Seconds Before a
+                Memoized Query Expires, None to Never Expire. Defaults to None.
+            backend (str, optional): Inference Backend, "torch" (fp32 eager),
+                "torch_int8" (dynamic quantization) or "onnx" (ONNX Runtime).
+                Defaults to "torch".
+            threads (int, optional): CPU Threads for Inference, 0 for the
+                Library Default. Defaults to 0.
+            onnx_directory (str, optional): ONNX Export Directory. Defaults
+                to "models/onnx".
+            min_agreement (float, optional): Min Cosine Similarity of a
+                Non-Default Backend with fp32 Torch. Defaults to 0.99.
+            chunk_tokens (int, optional): Target Tokens per Document Chunk.
+                Defaults to 128.
+            chunk_overlap_tokens (int, optional): Tokens of Trailing
+                Sentences Repeated in the Next Chunk. Defaults to 0.
+            precision (str, optional): Storage Precision of Document
+                Embeddings in the Cache and Database, "float32", "float16" or
+                "int8". Defaults to "float32".
         """
         self.tokenizer = AutoTokenizer.from_pretrained(
             model_id, token=HUGGINGFACE_API_KEY
         )
+        # Decoder Tokenizers may Ship without a Pad Token
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
         print(model_id)
         self.model = AutoModel.from_pretrained(model_id, token=HUGGINGFACE_API_KEY)
 
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
         self.model.to(self.device)
+        self.model.eval()
+
+        if pooling not in ("mean", "cls"):
+            raise ValueError(f"Unknown pooling {pooling!r}, expected mean or cls")
+        check_precision(precision)
+
+        self.model_id = model_id
+        self.pooling = pooling
+        self.normalize = normalize
+        self.precision = precision
+        self.batch_size = batch_size
+        # Encoders have Fixed Position Embeddings (Usually 512)
+        self.max_length = min(max_length, self.tokenizer.model_max_length)
+        self.chunks_per_second = 0.0
+        self.tokens_encoded = 0
+        self.tokens_padded = 0
+        self.chunker = Chunker(
+            model_id,
+            HUGGINGFACE_API_KEY,
+            target_tokens=chunk_tokens,
+            overlap_tokens=chunk_overlap_tokens,
+            tokenizer=self.tokenizer,
+        )
+        self.stores = {}
+        self.query_cache = TTLCache(query_cache_size, query_cache_ttl_seconds)
+        self.backend_name = backend
+        self.backend = self.load_backend(
+            backend, threads, onnx_directory, min_agreement
+        )
 
         if db_mode:
             self.db_config = self.load_db_config()
 
+    @classmethod
+    def from_config(
+        cls, config: dict, HUGGINGFACE_API_KEY: str, db_mode: bool = False
+    ) -> "Embeddings":
+        """
+        Create Embeddings from the TOML Config
+
+        The [embeddings] model, if set, replaces [model] id, so a small
+        sentence model can be used for retrieval. Chunk sizes are read from
+        [chunking].
+
+        Args:
+            config (dict): Config Dict
+            HUGGINGFACE_API_KEY (str): Huggingface API Key
+            db_mode (bool, optional): Database Mode. Defaults to False.
+
+        Returns:
+            Embeddings: Embeddings Object
+        """
+        settings = config.get("embeddings", {})
+        chunking = config.get("chunking", {})
+
+        return cls(
+            model_id=settings.get("model", config["model"]["id"]),
+            HUGGINGFACE_API_KEY=HUGGINGFACE_API_KEY,
+            db_mode=db_mode,
+            batch_size=settings.get("batch_size", 32),
+            max_length=settings.get("max_length", 512),
+            pooling=settings.get("pooling", "mean"),
+            normalize=settings.get("normalize", False),
+            backend=settings.get("backend", "torch"),
+            threads=settings.get("threads", 0),
+            onnx_directory=settings.get(
+                "onnx_directory", os.path.join("models", "onnx")
+            ),
+            min_agreement=settings.get("min_agreement", 0.99),
+            query_cache_size=settings.get("query_cache_size", 1024),
+            query_cache_ttl_seconds=settings.get("query_cache_ttl_seconds"),
+            chunk_tokens=chunking.get("target_tokens", 128),
+            chunk_overlap_tokens=chunking.get("overlap_tokens", 0),
+            precision=settings.get("precision", "float32"),
+        )
+
+    def load_backend(
+        self, backend: str, threads: int, onnx_directory: str, min_agreement: float
+    ):
+        """
+        Create the Inference Backend
+
+        A non-default backend must agree with fp32 torch on AGREEMENT_SAMPLE,
+        so its vectors can be mixed with cached fp32 embeddings.
+
+        Args:
+            backend (str): "torch", "torch_int8" or "onnx"
+            threads (int): CPU Threads, 0 for the Library Default
+            onnx_directory (str): ONNX Export Directory
+            min_agreement (float): Min Cosine Similarity with fp32 Torch
+
+        Raises:
+            ValueError: Unknown Backend, or Below min_agreement
+
+        Returns:
+            Callable: Maps Tokenizer Output to Last Hidden State
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.backend = TorchBackend(self.model, self.device)
+        if backend == "torch":
+            return self.backend
+
+        baseline = self.encode(AGREEMENT_SAMPLE)
+
+        if backend == "torch_int8":
+            self.backend = TorchInt8Backend(self.model, self.device)
+        else:
+            self.backend = OnnxBackend(
+                self.model, self.tokenizer, self.model_id, onnx_directory, threads
+            )
+
+        agreement = min(cosine_agreement(baseline, self.encode(AGREEMENT_SAMPLE)))
+        print(
+            f"{backend} backend agreement with fp32 torch: min cosine {agreement:.4f}"
+        )
+
+        if agreement < min_agreement:
+            raise ValueError(
+                f"{backend} backend embeddings disagree with fp32 torch "
+                f"(min cosine {agreement:.4f} < {min_agreement}), use backend = torch"
+            )
+
+        return self.backend
+
     def load_db_config(self):
         """
         Load Database Config
@@ -53,9 +254,159 @@ class Embeddings:
             "port": os.getenv("DB_PORT"),
         }
 
+    def encode(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """
+        Batched Embedding Generation
+
+        Chunks are sorted by token length and grouped into batches so each
+        batch pads to a similar length. Mean pooling is masked so padding
+        tokens do not contribute to the embedding.
+
+        Args:
+            texts (List[str]): Texts to Embed
+            batch_size (int, optional): Texts per Forward Pass. Defaults to
+                the batch size set on the object.
+
+        Returns:
+            np.ndarray: (len(texts), dimension) float32 Embeddings, in Input Order
+        """
+        batch_size = batch_size or self.batch_size
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        if not texts:
+            return embeddings
+
+        start_time = time.perf_counter()
+
+        # Bucket by Token Length to Keep Padding Low
+        lengths = self.tokenizer(
+            texts, truncation=True, max_length=self.max_length, return_length=True
+        )["length"]
+        order = np.argsort(lengths, kind="stable")
+
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start : start + batch_size]
+            inputs = self.tokenizer(
+                [texts[i] for i in batch_indices],
+                return_tensors="np",
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+            )
+
+            mask = inputs["attention_mask"]
+            self.tokens_encoded += int(mask.sum())
+            self.tokens_padded += mask.size
+
+            # Same Output from every Backend
+            hidden_state = self.backend(dict(inputs))
+
+            if self.pooling == "cls":
+                pooled = hidden_state[:, 0]
+            else:
+                # Masked Mean Pooling
+                mask = inputs["attention_mask"][..., None].astype(np.float32)
+                summed = (hidden_state * mask).sum(axis=1)
+                pooled = summed / mask.sum(axis=1).clip(min=1)
+
+            if self.normalize:
+                norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+                pooled = pooled / norms.clip(min=1e-12)
+
+            embeddings[batch_indices] = pooled
+
+        elapsed = time.perf_counter() - start_time
+        self.chunks_per_second = len(texts) / elapsed if elapsed > 0 else 0.0
+
+        return embeddings
+
+    @property
+    def padding_waste(self) -> float:
+        """
+        Share of Encoded Positions that were Padding, since Creation
+
+        Returns:
+            float: Padding Tokens / All Tokens
+        """
+        if not self.tokens_padded:
+            return 0.0
+        return 1 - self.tokens_encoded / self.tokens_padded
+
+    @property
+    def dimension(self) -> int:
+        """
+        Embedding Dimension
+
+        Returns:
+            int: Model Hidden Size
+        """
+        return self.model.config.hidden_size
+
+    @property
+    def signature(self) -> dict:
+        """
+        Settings that Determine an Embedding
+
+        Returns:
+            dict: Model ID and Pooling Settings
+        """
+        return {
+            "model_id": self.model_id,
+            "pooling": self.pooling,
+            "normalize": self.normalize,
+            "max_length": self.max_length,
+        }
+
+    @property
+    def signature_hash(self) -> str:
+        """
+        Digest of the Signature, Stored with each Database Embedding
+
+        Returns:
+            str: Hex Digest of Signature
+        """
+        signature = json.dumps(self.signature, sort_keys=True).encode()
+        return hashlib.sha256(signature).hexdigest()
+
+    def chunk_key(self, chunk: str) -> str:
+        """
+        Cache Key for a Chunk
+
+        Keys hash the chunk text together with the embedding signature, so
+        unchanged chunks are reused across edits and renames while vectors
+        from another model or pooling never match.
+
+        Args:
+            chunk (str): Chunk Text
+
+        Returns:
+            str: Hex Digest Cache Key
+        """
+        digest = hashlib.sha256(json.dumps(self.signature, sort_keys=True).encode())
+        digest.update(b"\0")
+        digest.update(chunk.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_store(self, embedding_directory: str) -> EmbeddingStore:
+        """
+        Get (or Open) the Embedding Cache for a Directory
+
+        Args:
+            embedding_directory (str): Save directory for generated embeddings.
+
+        Returns:
+            EmbeddingStore: Memory-Mapped Embedding Cache
+        """
+        directory = os.path.abspath(embedding_directory)
+        if directory not in self.stores:
+            self.stores[directory] = EmbeddingStore(
+                directory, self.signature, precision=self.precision
+            )
+        return self.stores[directory]
+
     def get_embeddings(
         self, titles: List[str], texts: List[str], embedding_directory: str
-    ) -> Tuple[List[np.ndarray], List[str]]:
+    ) -> Tuple[np.ndarray, List[str]]:
         """
         Load or Generate Embeddings Local
 
@@ -68,87 +419,124 @@ class Embeddings:
                 Save directory for generated embeddings.
 
         Returns:
-            Tuple[List[np.ndarray], List[str]]:
+            Tuple[np.ndarray, List[str]]:
+                Returns generated embeddings and text chunks.
+        """
+        return self.embed_documents(
+            ((title, [text]) for title, text in zip(titles, texts)),
+            embedding_directory,
+        )
+
+    def embed_documents(
+        self,
+        documents: Iterable[Tuple[str, Iterable[str]]],
+        embedding_directory: str,
+        flush_size: int = 1024,
+    ) -> Tuple[np.ndarray, List[str]]:
+        """
+        Load or Generate Embeddings for Streamed Documents
+
+        Documents are chunked as their blocks arrive, and uncached chunks
+        are embedded and appended to the cache every flush_size chunks, so
+        memory does not grow with document or corpus size (apart from the
+        labels and the returned memory-mapped rows).
+
+        Args:
+            documents (Iterable[Tuple[str, Iterable[str]]]): Title and Blocks
+                of Text per Document, e.g. DocumentLoader.iter_documents()
+            embedding_directory (str): Save directory for generated embeddings.
+            flush_size (int, optional): Uncached Chunks Embedded Together.
+                Defaults to 1024.
+
+        Returns:
+            Tuple[np.ndarray, List[str]]:
                 Returns generated embeddings and text chunks.
         """
-        os.makedirs(embedding_directory, exist_ok=True)
-        embeddings = []
+        store = self.get_store(embedding_directory)
+        keys = []
         chunked_texts_with_titles = []
+        missing_chunks, missing_keys = [], []
+        embedded = 0
 
-        for title, text in zip(titles, texts):
-            sentences = sent_tokenize(text)
-            chunked_texts = [
-                " ".join(sentences[i : i + 3]) for i in range(0, len(sentences), 3)
-            ]
+        def flush():
+            store.append(missing_keys, self.encode(missing_chunks))
+            missing_chunks.clear()
+            missing_keys.clear()
 
+        for title, blocks in documents:
             # Iterate Through Chunk Number, and Chunk
-            for idx, chunk in enumerate(chunked_texts):
-                chunk_title = f"{title.replace(' ', '_')}_{idx + 1}"
+            for idx, (_, chunk) in enumerate(self.chunker.chunk(blocks)):
                 chunked_text_with_title = f"{title}_Chunk_{idx + 1}: {chunk}"
                 chunked_texts_with_titles.append(chunked_text_with_title)
+                key = self.chunk_key(chunk)
+                keys.append(key)
+
+                # Queue Chunk for Batched Generation if not Cached
+                if key not in store:
+                    missing_chunks.append(chunk)
+                    missing_keys.append(key)
+                    embedded += 1
+
+                    if len(missing_chunks) >= flush_size:
+                        flush()
+
+        # Generate Missing Embeddings
+        if missing_chunks:
+            flush()
+
+        if embedded:
+            print(
+                f"Embedded {embedded} chunks "
+                f"({self.chunks_per_second:.1f} chunks/s, "
+                f"batch size {self.batch_size}, "
+                f"{self.padding_waste:.0%} padding)"
+            )
 
-                file_path = os.path.join(embedding_directory, chunk_title + ".npy")
-
-                # Check if Embedding Exists for Chunk
-                if os.path.exists(file_path):
-                    embedding = np.load(file_path, allow_pickle=True).tolist()
-                    embeddings.extend(embedding)
-
-                # Else Generate Embedding
-                else:
-                    inputs = self.tokenizer(
-                        chunk,
-                        return_tensors="pt",
-                        padding=True,
-                        truncation=True,
-                        max_length=512,
-                    )
-                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-                    with torch.no_grad():
-                        outputs = self.model(**inputs)
+        return store.get(keys), chunked_texts_with_titles
 
-                    last_hidden_state = outputs.last_hidden_state
-                    mean_hidden_state = last_hidden_state.mean(dim=1)
-                    cpu_mean_hidden_state = mean_hidden_state.cpu()
-                    numpy_mean_hidden_state = cpu_mean_hidden_state.numpy()
-                    embedding = numpy_mean_hidden_state[0]
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        """
+        Query Cache Key
 
-                    embeddings.append(embedding.astype(np.float32))
+        Unicode and whitespace are normalized. Case is kept, the tokenizer
+        is case sensitive so case changes the embedding.
 
-                    # Save Embedding Locally
-                    np.save(file_path, [embedding])
+        Args:
+            text (str): Query
 
-        return embeddings, chunked_texts_with_titles
+        Returns:
+            str: Normalized Query
+        """
+        return " ".join(unicodedata.normalize("NFC", text).split())
 
     def get_embeddings_query(self, texts: List[str]) -> List[np.ndarray]:
         """
         Get Embedding for Query
 
+        Repeated queries are served from the query cache without running
+        the model. Misses are encoded together in one batch.
+
         Args:
             texts (List[str]): Query
 
         Returns:
             List[np.ndarray]: Embedding for Query
         """
-        embeddings = []
-
-        # Iterate through Queries
-        for text in texts:
-            inputs = self.tokenizer(
-                text, return_tensors="pt", padding=True, truncation=True, max_length=512
-            )
-
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        keys = [self.normalize_query(text) for text in texts]
+        found = {key: self.query_cache.get(key) for key in set(keys)}
 
-            with torch.no_grad():
-                outputs = self.model(**inputs)
+        missing = [key for key, embedding in found.items() if embedding is None]
+        if missing:
+            for key, embedding in zip(missing, self.encode(missing)):
+                # Own Copy, not a View Keeping the Batch Alive. Shared
+                # between Callers, so Read-Only
+                embedding = embedding.copy()
+                embedding.flags.writeable = False
+                self.query_cache.put(key, embedding)
+                found[key] = embedding
 
-            # Generate Embedding
-            embedding = outputs.last_hidden_state.mean(dim=1).cpu().numpy()[0]
-            embeddings.append(embedding.astype(np.float32))
-
-        return embeddings
+        return [found[key] for key in keys]
 
     def get_chunk(self, title: str, chunk_text: str = None) -> List[Tuple[int, str]]:
         """
@@ -161,76 +549,373 @@ class Embeddings:
         Returns:
             List[Tuple[int, str]]: List of Chunks, IDs
         """
-        conn = psycopg2.connect(**self.db_config)
-        cursor = conn.cursor()
+        with connection(self.db_config) as conn:
+            cursor = conn.cursor()
+
+            # If Chunk ID Given
+            if chunk_text:
+                cursor.execute(
+                    """
+                    SELECT id, chunk_text FROM chunks WHERE
+                    document_id = (SELECT id FROM documents WHERE title = %s)
+                    AND chunk_hash = %s
+                    """,
+                    (title, chunk_hash(chunk_text)),
+                )
+
+            # Get All Chunks for Document ID
+            else:
+                cursor.execute(
+                    """
+                    SELECT id, chunk_text FROM chunks WHERE
+                    document_id = (SELECT id FROM documents WHERE title = %s)
+                    ORDER BY position
+                    """,
+                    (title,),
+                )
+
+            chunks = cursor.fetchall()
+            cursor.close()
+
+        return chunks
 
-        # If Chunk ID Given
-        if chunk_text:
+    def get_embedding(self, chunk_id: int = None) -> List[np.ndarray]:
+        """
+        Get Embeddings from Database
+
+        Only embeddings made with the current signature are returned.
+
+        Args:
+            chunk_id (int, optional): Chunk ID of Embedding. Defaults to None.
+
+        Returns:
+            List[np.ndarray]: List of Embeddings
+        """
+        with connection(self.db_config) as conn:
+            cursor = conn.cursor()
+
+            if chunk_id:
+                cursor.execute(
+                    """
+                    SELECT embedding FROM embeddings WHERE
+                    chunk_id = %s AND signature = %s
+                    """,
+                    (chunk_id, self.signature_hash),
+                )
+
+            else:
+                cursor.execute(
+                    "SELECT embedding FROM embeddings WHERE signature = %s",
+                    (self.signature_hash,),
+                )
+
+            embeddings = cursor.fetchall()
+            cursor.close()
+
+        np_embeddings = [
+            decode_bytes(embedding[0], self.dimension) for embedding in embeddings
+        ]
+
+        return np_embeddings
+
+    def iter_embeddings_db(
+        self, batch_size: int = 10000
+    ) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """
+        Stream all Stored Embeddings from Database
+
+        Rows are read with a server-side cursor and decoded straight into a
+        reused float32 block, so only one block is held at a time. The block
+        is overwritten on the next iteration, copy it to keep it. Chunks are
+        numbered by their stored position, so labels match the ones given at
+        ingest however often a document was edited. Embeddings
+        made with another model or pooling are skipped, ingesting their
+        documents re-embeds them.
+
+        Args:
+            batch_size (int, optional): Rows per Block. Defaults to 10000.
+
+        Yields:
+            Tuple[List[str], np.ndarray]: Text Chunks and Embeddings of Block
+        """
+        block = np.empty((batch_size, self.dimension), dtype=np.float32)
+
+        with connection(self.db_config) as conn:
+            cursor = conn.cursor()
             cursor.execute(
-                """
-                SELECT id, chunk_text FROM chunks WHERE
-                document_id = (SELECT id FROM documents WHERE title = %s)
-                AND chunk_text = %s
-                """,
-                (title, chunk_text),
+                "SELECT count(*) FROM embeddings WHERE signature IS DISTINCT FROM %s",
+                (self.signature_hash,),
             )
-
-        # Get All Chunks for Document ID
-        else:
+            outdated = cursor.fetchone()[0]
+            cursor.close()
+            if outdated:
+                print(
+                    f"Skipping {outdated} Embeddings from Another Model or Pooling, "
+                    "Re-ingest their Documents to Serve them"
+                )
+
+            cursor = conn.cursor(name="iter_embeddings")
+            cursor.itersize = batch_size
             cursor.execute(
                 """
-                SELECT id, chunk_text FROM chunks WHERE
-                document_id = (SELECT id FROM documents WHERE title = %s)
+                SELECT c.position, d.title, c.chunk_text, e.embedding
+                FROM embeddings e
+                JOIN chunks c ON c.id = e.chunk_id
+                JOIN documents d ON d.id = c.document_id
+                WHERE e.signature = %s
+                ORDER BY c.document_id, c.position
                 """,
-                (title,),
+                (self.signature_hash,),
             )
 
-        chunks = cursor.fetchall()
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
 
-        cursor.close()
-        conn.close()
+                chunked_texts_with_titles = []
+                for idx, (position, title, chunk_text, embedding) in enumerate(rows):
+                    block[idx] = decode_bytes(embedding, self.dimension)
+                    chunked_texts_with_titles.append(
+                        f"{title}_Chunk_{position + 1}: {chunk_text}"
+                    )
 
-        return chunks
+                yield chunked_texts_with_titles, block[: len(rows)]
 
-    def get_embedding(self, chunk_id: int = None) -> List[np.ndarray]:
+            cursor.close()
+
+    def sample_embeddings_db(self, size: int) -> np.ndarray:
         """
-        Get Embeddings from Database
+        Random Sample of Stored Embeddings from across the Database
+
+        Rows are sampled with TABLESAMPLE BERNOULLI, seeded so repeated
+        startups train the same index. Only embeddings with the current
+        signature are sampled, and the rate is sized on those rows. A sample
+        that still comes back short is redrawn with a seeded ORDER BY
+        random().
 
         Args:
-            chunk_id (int, optional): Chunk ID of Embedding. Defaults to None.
+            size (int): Maximum Number of Embeddings
 
         Returns:
-            List[np.ndarray]: List of Embeddings
+            np.ndarray: (<= size, dimension) float32 Embeddings
         """
-        conn = psycopg2.connect(**self.db_config)
-        cursor = conn.cursor()
+        with connection(self.db_config) as conn:
+            cursor = conn.cursor()
 
-        if chunk_id:
+            cursor.execute(
+                "SELECT count(*) FROM embeddings WHERE signature = %s",
+                (self.signature_hash,),
+            )
+            total = cursor.fetchone()[0]
+            size = min(size, total)
+
+            # Oversampled a Little, as BERNOULLI Returns about, not Exactly, size
+            percent = min(100.0, 110.0 * size / max(total, 1))
             cursor.execute(
                 """
-                SELECT embedding FROM embeddings WHERE
-                chunk_id = %s
+                SELECT embedding FROM embeddings
+                TABLESAMPLE BERNOULLI (%s) REPEATABLE (0)
+                WHERE signature = %s LIMIT %s
                 """,
-                (chunk_id,),
+                (percent, self.signature_hash, size),
             )
+            rows = cursor.fetchall()
+
+            if len(rows) < size:
+                cursor.execute("SELECT setseed(0)")
+                cursor.execute(
+                    """
+                    SELECT embedding FROM embeddings WHERE signature = %s
+                    ORDER BY random() LIMIT %s
+                    """,
+                    (self.signature_hash, size),
+                )
+                rows = cursor.fetchall()
+
+            cursor.close()
+
+        sample = np.empty((len(rows), self.dimension), dtype=np.float32)
+        for idx, (embedding,) in enumerate(rows):
+            sample[idx] = decode_bytes(embedding, self.dimension)
+
+        return sample
+
+    def ingest_document_db(
+        self, title: str, text: str, chunks: List[str]
+    ) -> np.ndarray:
+        """
+        Load or Generate Embeddings for One Document in One Transaction
 
-        else:
-            cursor.execute("SELECT embedding FROM embeddings")
+        Existing chunks and embeddings are fetched with a single query, new
+        chunks and embeddings are written with bulk inserts. Chunks the
+        document no longer has are deleted, so a changed document replaces
+        its old version, and each chunk's position in the document is kept
+        up to date (a repeated chunk is stored once, at its first position).
+        Embeddings made with another signature (model or
+        pooling) are regenerated and overwritten.
 
-        embeddings = cursor.fetchall()
+        Args:
+            title (str): Title of Document
+            text (str): Document Text (Stored if the Document is New)
+            chunks (List[str]): Chunk Texts of Document, in Order
 
-        cursor.close()
-        conn.close()
+        Returns:
+            np.ndarray: (len(chunks), dimension) float32 Embeddings
+        """
+        with connection(self.db_config) as conn:
+            cursor = conn.cursor()
 
-        np_embeddings = [
-            np.frombuffer(embedding[0], dtype=np.float32) for embedding in embeddings
-        ]
+            cursor.execute(
+                """
+                INSERT INTO documents (title, content) VALUES (%s, %s)
+                ON CONFLICT (title) DO UPDATE SET content = EXCLUDED.content
+                """,
+                (title, text),
+            )
+            cursor.execute("SELECT id FROM documents WHERE title = %s", (title,))
+            document_id = cursor.fetchone()[0]
 
-        return np_embeddings
+            # Existing Chunks and Embeddings for Document
+            cursor.execute(
+                """
+                SELECT c.id, c.chunk_hash, c.position, e.embedding FROM chunks c
+                LEFT JOIN embeddings e
+                ON e.chunk_id = c.id AND e.signature = %s
+                WHERE c.document_id = %s
+                """,
+                (self.signature_hash, document_id),
+            )
+            chunk_ids, stored_positions, stored = {}, {}, {}
+            for chunk_id, hash_, position, embedding in cursor.fetchall():
+                chunk_ids[hash_] = chunk_id
+                stored_positions[hash_] = position
+                if embedding is not None:
+                    stored[hash_] = decode_bytes(embedding, self.dimension)
+
+            hashes = [chunk_hash(chunk) for chunk in chunks]
+            texts = dict(zip(hashes, chunks))
+
+            # Position of Each Chunk's First Occurrence
+            positions = {}
+            for idx, hash_ in enumerate(hashes):
+                positions.setdefault(hash_, idx)
+
+            # Delete Chunks of an Older Version
+            stale = [chunk_ids.pop(h) for h in list(chunk_ids) if h not in texts]
+            if stale:
+                self.delete_chunks_db(cursor, stale)
+
+            # Renumber Kept Chunks that Moved
+            moved = [h for h in chunk_ids if stored_positions.get(h) != positions[h]]
+            if moved:
+                execute_values(
+                    cursor,
+                    """
+                    UPDATE chunks SET position = v.position
+                    FROM (VALUES %s) AS v (id, position) WHERE chunks.id = v.id
+                    """,
+                    [(chunk_ids[h], positions[h]) for h in moved],
+                    page_size=len(moved),
+                )
+
+            # Bulk Insert New Chunks
+            new_hashes = [h for h in texts if h not in chunk_ids]
+            if new_hashes:
+                rows = execute_values(
+                    cursor,
+                    """
+                    INSERT INTO chunks (document_id, chunk_text, chunk_hash, position)
+                    VALUES %s ON CONFLICT (document_id, chunk_hash) DO NOTHING
+                    RETURNING id, chunk_hash
+                    """,
+                    [(document_id, texts[h], h, positions[h]) for h in new_hashes],
+                    page_size=len(new_hashes),
+                    fetch=True,
+                )
+                chunk_ids.update({hash_: chunk_id for chunk_id, hash_ in rows})
+
+            # Generate and Bulk Insert Missing Embeddings
+            missing = [h for h in texts if h not in stored]
+            if missing:
+                rows = encode_vectors(
+                    self.encode([texts[h] for h in missing]), self.precision
+                )
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO embeddings (chunk_id, embedding, signature)
+                    VALUES %s ON CONFLICT (chunk_id) DO UPDATE
+                    SET embedding = EXCLUDED.embedding,
+                    signature = EXCLUDED.signature
+                    """,
+                    [
+                        (
+                            chunk_ids[h],
+                            psycopg2.Binary(row.tobytes()),
+                            self.signature_hash,
+                        )
+                        for h, row in zip(missing, rows)
+                    ],
+                    page_size=len(missing),
+                )
+                # As Stored, so Later Reads Match
+                stored.update(zip(missing, decode_vectors(rows, self.precision)))
+
+            cursor.close()
+
+        embeddings = np.zeros((len(chunks), self.dimension), dtype=np.float32)
+        for idx, hash_ in enumerate(hashes):
+            embeddings[idx] = stored[hash_]
+
+        return embeddings
+
+    @staticmethod
+    def delete_chunks_db(cursor, chunk_ids: List[int]):
+        """
+        Delete Chunks and their Embeddings
+
+        Args:
+            cursor: Open Database Cursor
+            chunk_ids (List[int]): Chunk IDs
+        """
+        cursor.execute(
+            "DELETE FROM embeddings WHERE chunk_id = ANY(%s)", (list(chunk_ids),)
+        )
+        cursor.execute("DELETE FROM chunks WHERE id = ANY(%s)", (list(chunk_ids),))
+
+    def delete_document_db(self, title: str) -> int:
+        """
+        Delete a Document with its Chunks and Embeddings
+
+        Args:
+            title (str): Title of Document
+
+        Returns:
+            int: Number of Chunks Deleted
+        """
+        with connection(self.db_config) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                """
+                SELECT c.id FROM chunks c JOIN documents d ON d.id = c.document_id
+                WHERE d.title = %s
+                """,
+                (title,),
+            )
+            chunk_ids = [row[0] for row in cursor.fetchall()]
+            if chunk_ids:
+                self.delete_chunks_db(cursor, chunk_ids)
+            cursor.execute("DELETE FROM documents WHERE title = %s", (title,))
+
+            cursor.close()
+
+        return len(chunk_ids)
 
     def get_embeddings_db(
         self, titles: List[str], texts: List[str]
-    ) -> Tuple[List[np.ndarray], List[str]]:
+    ) -> Tuple[np.ndarray, List[str]]:
         """
         Load or Generate Embeddings Database
 
@@ -239,88 +924,22 @@ class Embeddings:
                 List of titles for documents.
             texts (List[str]):
                 List of texts for documents.
-            embedding_directory (str):
-                Save directory for generated embeddings.
 
         Returns:
-            Tuple[List[np.ndarray], List[str]]:
+            Tuple[np.ndarray, List[str]]:
                 Returns generated embeddings and text chunks.
         """
-        embeddings = []
+        embeddings = [np.zeros((0, self.dimension), dtype=np.float32)]
         chunked_texts_with_titles = []
 
         for title, text in zip(titles, texts):
-            sentences = sent_tokenize(text)
-            chunked_texts = [
-                " ".join(sentences[i : i + 3]) for i in range(0, len(sentences), 3)
-            ]
+            chunked_texts = [chunk for _, chunk in self.chunker.chunk([text])]
 
             # Iterate through Chunk Number, Chunk
             for idx, chunk in enumerate(chunked_texts):
                 chunked_text_with_title = f"{title}_Chunk_{idx + 1}: {chunk}"
                 chunked_texts_with_titles.append(chunked_text_with_title)
 
-                chunk_result = self.get_chunk(title, chunk)
-
-                # Get Chunk if Exists
-                if chunk_result:
-                    chunk_id = chunk_result[0][0]
-
-                # Else Add to Database
-                else:
-                    conn = psycopg2.connect(**self.db_config)
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        """
-                        INSERT INTO chunks (document_id, chunk_text)
-                        VALUES ((SELECT id FROM documents
-                        WHERE title = %s), %s) RETURNING id
-                        """,
-                        (title, chunk),
-                    )
-                    chunk_id = cursor.fetchone()[0]
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
-
-                # Get Chunk Embedding
-                embedding_result = self.get_embedding(chunk_id)
-
-                # If Chunk Embedding Exists, Append to Output
-                if embedding_result:
-                    embedding = np.frombuffer(embedding_result[0][1], dtype=np.float32)
-                    embeddings.append(embedding)
-
-                # Else Generate Chunk
-                else:
-                    inputs = self.tokenizer(
-                        chunk,
-                        return_tensors="pt",
-                        padding=True,
-                        truncation=True,
-                        max_length=512,
-                    )
-                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-                    with torch.no_grad():
-                        outputs = self.model(**inputs)
-
-                    embedding = outputs.last_hidden_state.mean(dim=1).cpu().numpy()[0]
-
-                    embeddings.append(embedding.astype(np.float32))
-
-                    # Save the embedding in the database
-                    conn = psycopg2.connect(**self.db_config)
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        """
-                        INSERT INTO embeddings (chunk_id, embedding)
-                        VALUES (%s, %s)
-                        """,
-                        (chunk_id, psycopg2.Binary(embedding.tobytes())),
-                    )
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
+            embeddings.append(self.ingest_document_db(title, text, chunked_texts))
 
-        return embeddings, chunked_texts_with_titles
+        return np.concatenate(embeddings), chunked_texts_with_titles
@@ -0,0 +1,185 @@
+import hashlib
+import inspect
+import os
+from typing import Dict, List
+
+import numpy as np
+import torch
+
+BACKENDS = ("torch", "torch_int8", "onnx")
+
+
+class TorchBackend:
+    def __init__(self, model: torch.nn.Module, device: torch.device):
+        """
+        PyTorch Eager Inference
+
+        Args:
+            model (torch.nn.Module): Hugging Face Model
+            device (torch.device): Device the Model is On
+        """
+        self.model = model
+        self.device = device
+
+    def __call__(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Run the Model
+
+        Args:
+            inputs (Dict[str, np.ndarray]): Tokenizer Output
+
+        Returns:
+            np.ndarray: (batch, sequence, hidden) float32 Last Hidden State
+        """
+        tensors = {k: torch.from_numpy(v).to(self.device) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            outputs = self.model(**tensors)
+
+        return outputs.last_hidden_state.float().cpu().numpy()
+
+
+class TorchInt8Backend(TorchBackend):
+    def __init__(self, model: torch.nn.Module, device: torch.device):
+        """
+        PyTorch Eager Inference with Dynamic int8 Linear Layers
+
+        Linear weights are quantized once, activations per batch. CPU only.
+        The model is quantized in place.
+
+        Args:
+            model (torch.nn.Module): Hugging Face Model
+            device (torch.device): Device the Model is On
+        """
+        if device.type != "cpu":
+            raise ValueError("torch_int8 backend runs on CPU only")
+
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        super().__init__(model, device)
+
+
+class OnnxBackend:
+    def __init__(
+        self,
+        model: torch.nn.Module,
+        tokenizer,
+        model_id: str,
+        directory: str,
+        threads: int = 0,
+    ):
+        """
+        ONNX Runtime Inference
+
+        The model is exported once to directory/<model hash>/model.onnx and
+        reused on later starts.
+
+        Args:
+            model (torch.nn.Module): Hugging Face Model (fp32)
+            tokenizer: Matching Tokenizer
+            model_id (str): Model ID or Path (Export Cache Key)
+            directory (str): Export Directory
+            threads (int, optional): Intra-Op Threads, 0 for ONNX Runtime's
+                Default. Defaults to 0.
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError(
+                "onnx backend requires onnxruntime (pip install onnxruntime)"
+            )
+
+        # Padded Sample, so the Attention Mask Path is Traced
+        sample = tokenizer(
+            ["Export sample.", "A longer export sample sentence, with padding."],
+            return_tensors="pt",
+            padding=True,
+        )
+        self.input_names = list(sample.keys())
+
+        model_hash = hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(directory, model_hash, "model.onnx")
+        if not os.path.exists(path):
+            self.export(model, sample, path)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        # Inputs the Model Ignores are Dropped at Export
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def export(self, model: torch.nn.Module, sample: Dict, path: str):
+        """
+        Export the Model to ONNX with Dynamic Batch and Sequence Axes
+
+        Args:
+            model (torch.nn.Module): Hugging Face Model
+            sample (Dict): Example Tokenizer Output
+            path (str): Output File
+        """
+        input_names = self.input_names
+
+        class LastHiddenState(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *args):
+                return self.model(**dict(zip(input_names, args))).last_hidden_state
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        axes = {0: "batch", 1: "sequence"}
+
+        # TorchScript Exporter, the Default before torch 2.9
+        options = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            options["dynamo"] = False
+
+        print(f"Exporting ONNX model to {path}")
+        wrapper = LastHiddenState().eval()
+        with torch.no_grad():
+            torch.onnx.export(
+                wrapper,
+                tuple(sample[name].cpu() for name in input_names),
+                path + ".tmp",
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    name: axes for name in input_names + ["last_hidden_state"]
+                },
+                opset_version=17,
+                **options,
+            )
+        os.replace(path + ".tmp", path)
+
+    def __call__(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Run the Model
+
+        Args:
+            inputs (Dict[str, np.ndarray]): Tokenizer Output
+
+        Returns:
+            np.ndarray: (batch, sequence, hidden) float32 Last Hidden State
+        """
+        feed = {name: inputs[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(["last_hidden_state"], feed)[0].astype(np.float32)
+
+
+def cosine_agreement(baseline: np.ndarray, candidate: np.ndarray) -> List[float]:
+    """
+    Row-Wise Cosine Similarity
+
+    Args:
+        baseline (np.ndarray): (n, dimension) Reference Embeddings
+        candidate (np.ndarray): (n, dimension) Embeddings to Check
+
+    Returns:
+        List[float]: Cosine Similarity per Row
+    """
+    baseline = baseline / np.linalg.norm(baseline, axis=1, keepdims=True).clip(1e-12)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True).clip(1e-12)
+    return list((baseline * candidate).sum(axis=1))
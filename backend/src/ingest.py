@@ -0,0 +1,542 @@
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from .db import connection
+from .chunker import Chunker, chunk_stats
+from .embeddings import Embeddings
+from .vector_store import VectorStore
+
+
+def title_from_filename(filename: str) -> str:
+    """
+    Document Title from its File Name
+
+    Args:
+        filename (str): e.g. "Romeo_and_Juliet.txt"
+
+    Returns:
+        str: e.g. "Romeo and Juliet"
+    """
+    return filename.split(".txt")[0].replace("_", " ")
+
+
+def document_labels(title: str, chunks: List[str]) -> List[str]:
+    """
+    Labels Stored in the Vector Store
+
+    Args:
+        title (str): Document Title
+        chunks (List[str]): Chunk Texts, in Order
+
+    Returns:
+        List[str]: "{title}_Chunk_{number}: {text}" Labels
+    """
+    return [f"{title}_Chunk_{idx + 1}: {chunk}" for idx, chunk in enumerate(chunks)]
+
+
+def read_and_chunk(
+    path: str, chunker: Chunker, manifest_directory: str = None, keep_text: bool = False
+) -> dict:
+    """
+    Read One Document and Split it into Token-Budgeted Chunks
+
+    Runs in a worker process. The file is streamed in blocks, so only the
+    chunks (and the text in database mode) are held in memory. An unchanged
+    file is chunked from its manifest without splitting sentences.
+
+    Args:
+        path (str): Document Path
+        chunker (Chunker): Chunker
+        manifest_directory (str, optional): Chunk Manifest Directory.
+            Defaults to None.
+        keep_text (bool, optional): Return the Full Text (Database Mode).
+            Defaults to False.
+
+    Returns:
+        dict: path, title, chunks, tokens, bytes, seconds and text (if kept)
+    """
+    start_time = time.perf_counter()
+
+    chunks, tokens = [], []
+    for chunk, text in chunker.chunk_file(path, manifest_directory):
+        chunks.append(text)
+        tokens.append(chunk.tokens)
+
+    text = None
+    if keep_text:
+        with open(path, "r") as file:
+            text = file.read()
+
+    return {
+        "path": path,
+        "title": title_from_filename(os.path.basename(path)),
+        "chunks": chunks,
+        "tokens": tokens,
+        "text": text,
+        "bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - start_time,
+    }
+
+
+class IngestPipeline:
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        record_directory: str,
+        embedding_directory: str = None,
+        db_mode: bool = False,
+        workers: int = 0,
+        queue_size: int = 8,
+        progress_every: int = 10,
+    ):
+        """
+        Parallel Document Ingestion
+
+        Three stages joined by bounded queues:
+            read:  a process pool reads and chunks files (chunk manifests
+                   are kept in record_directory/manifests)
+            embed: one thread encodes uncached chunks in batches
+            write: one thread appends to the embedding cache (or database)
+                   and records the finished document
+
+        A document's record is written only after its embeddings are stored,
+        so after a crash, documents with an up to date record are skipped.
+        Records hold cache keys only, the chunk text of a resumed document
+        is sliced from the file with its chunk manifest.
+
+        Reader processes are spawned, not forked, as the embed and write
+        threads and the model's thread pools are already running.
+
+        Args:
+            embeddings (Embeddings): Embeddings Object
+            record_directory (str): Directory for Per-Document Records
+            embedding_directory (str, optional): Embedding Cache Directory
+                (Local Mode). Defaults to None.
+            db_mode (bool, optional): Store Chunks and Embeddings in the
+                Database. Defaults to False.
+            workers (int, optional): Reader Processes, 0 for one per CPU.
+                Defaults to 0.
+            queue_size (int, optional): Documents Waiting Between Stages.
+                Defaults to 8.
+            progress_every (int, optional): Print Progress Every n
+                Documents. Defaults to 10.
+        """
+        self.embeddings = embeddings
+        self.record_directory = record_directory
+        self.db_mode = db_mode
+        self.store = None if db_mode else embeddings.get_store(embedding_directory)
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.progress_every = progress_every
+
+        self.manifest_directory = os.path.join(record_directory, "manifests")
+
+        os.makedirs(record_directory, exist_ok=True)
+
+        self.labels = []
+        self.keys = []
+        self.tokens = []
+        self.error = None
+        self.stats = {
+            stage: {"documents": 0, "chunks": 0, "bytes": 0, "seconds": 0.0}
+            for stage in ("read", "embed", "write")
+        }
+
+    def record_path(self, path: str) -> str:
+        return os.path.join(self.record_directory, os.path.basename(path) + ".json")
+
+    def load_record(self, path: str) -> dict:
+        """
+        Record of a Finished Document, if Still Valid
+
+        Args:
+            path (str): Document Path
+
+        Returns:
+            dict: Record, None if the File or Embedding Settings Changed
+        """
+        record_path = self.record_path(path)
+        if not os.path.exists(record_path):
+            return None
+
+        with open(record_path, "r") as file:
+            record = json.load(file)
+
+        stat = os.stat(path)
+        if (
+            record.get("size") != stat.st_size
+            or record.get("mtime_ns") != stat.st_mtime_ns
+            or record.get("signature") != self.embeddings.signature
+            or record.get("chunking") != self.embeddings.chunker.settings
+        ):
+            return None
+
+        if self.store is not None and not all(
+            key in self.store for key in record["keys"]
+        ):
+            return None
+
+        if self.db_mode and not self.document_in_db(record["title"]):
+            return None
+
+        chunks = [
+            text
+            for _, text in self.embeddings.chunker.chunk_file(
+                path, self.manifest_directory
+            )
+        ]
+        if len(chunks) != record.get("chunks"):
+            return None
+
+        record["labels"] = document_labels(record["title"], chunks)
+        return record
+
+    def document_in_db(self, title: str) -> bool:
+        """
+        Whether the Database Still has the Document (it may have been Cleared)
+
+        Every chunk must also have an embedding with the current signature,
+        else the document is ingested again to re-embed it.
+
+        Args:
+            title (str): Document Title
+
+        Returns:
+            bool: Document Row Exists with Current Embeddings
+        """
+        with connection(self.embeddings.db_config) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT NOT EXISTS (
+                    SELECT 1 FROM chunks c
+                    LEFT JOIN embeddings e
+                    ON e.chunk_id = c.id AND e.signature = %s
+                    WHERE c.document_id = d.id AND e.id IS NULL
+                ) FROM documents d WHERE d.title = %s
+                """,
+                (self.embeddings.signature_hash, title),
+            )
+            row = cursor.fetchone()
+            return row is not None and row[0]
+
+    def save_record(self, document: dict):
+        """
+        Record a Finished Document
+
+        Args:
+            document (dict): Document with labels and keys
+        """
+        stat = os.stat(document["path"])
+        record = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "signature": self.embeddings.signature,
+            "chunking": self.embeddings.chunker.settings,
+            "title": document["title"],
+            "chunks": len(document["labels"]),
+            "keys": document["keys"],
+        }
+
+        record_path = self.record_path(document["path"])
+        with open(record_path + ".tmp", "w") as file:
+            json.dump(record, file)
+        os.replace(record_path + ".tmp", record_path)
+
+    def embed(self, document: dict) -> dict:
+        """
+        Embed Stage: Encode Chunks not in the Cache
+
+        Args:
+            document (dict): Read Stage Output
+
+        Returns:
+            dict: Document with labels, keys and new embeddings
+        """
+        chunks = document["chunks"]
+        document["labels"] = document_labels(document["title"], chunks)
+
+        if self.db_mode:
+            # Embeds Missing Chunks and Writes them in One Transaction
+            document["embeddings"] = self.embeddings.ingest_document_db(
+                document["title"], document["text"], chunks
+            )
+            document["keys"] = []
+            return document
+
+        document["keys"] = [self.embeddings.chunk_key(chunk) for chunk in chunks]
+        missing = [i for i, key in enumerate(document["keys"]) if key not in self.store]
+        document["missing_keys"] = [document["keys"][i] for i in missing]
+        document["missing_embeddings"] = self.embeddings.encode(
+            [chunks[i] for i in missing]
+        )
+        return document
+
+    def write(self, document: dict):
+        """
+        Write Stage: Append New Embeddings, then Record the Document
+
+        Args:
+            document (dict): Embed Stage Output
+        """
+        if document.get("missing_keys"):
+            self.store.append(document["missing_keys"], document["missing_embeddings"])
+
+        self.save_record(document)
+
+    def read(self, path: str) -> dict:
+        """
+        Read Stage for One Document, in this Process
+
+        Args:
+            path (str): Document Path
+
+        Returns:
+            dict: Read Stage Output
+        """
+        return read_and_chunk(
+            path, self.embeddings.chunker, self.manifest_directory, self.db_mode
+        )
+
+    def update(self, vector_store: VectorStore, path: str) -> Dict[str, int]:
+        """
+        Ingest One New or Changed Document into a Live Vector Store
+
+        Only this file is read. Chunks whose text is already cached (or
+        stored) are not embedded again, and chunks already in the index
+        are kept, so only the changed chunks are added and removed.
+
+        Args:
+            vector_store (VectorStore): Vector Store to Update
+            path (str): Document Path
+
+        Returns:
+            Dict[str, int]: Number of Chunks kept, added and removed
+        """
+        document = self.read(path)
+        self.embed(document)
+        self.write(document)
+
+        if self.db_mode:
+            embeddings = document["embeddings"]
+
+            def get_embeddings(rows):
+                return embeddings[rows]
+
+        else:
+
+            def get_embeddings(rows):
+                return self.store.get([document["keys"][row] for row in rows])
+
+        return vector_store.replace_document(
+            document["title"], document["labels"], document["chunks"], get_embeddings
+        )
+
+    def delete(self, vector_store: VectorStore, path: str) -> int:
+        """
+        Remove a Document from a Live Vector Store, its Record and File
+
+        Cached embeddings are kept, they are shared by content.
+
+        Args:
+            vector_store (VectorStore): Vector Store to Update
+            path (str): Document Path
+
+        Returns:
+            int: Number of Chunks Removed from the Index
+        """
+        title = title_from_filename(os.path.basename(path))
+        removed = vector_store.remove_document(title)
+
+        if self.db_mode:
+            self.embeddings.delete_document_db(title)
+
+        for file_path in (self.record_path(path), path):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        return removed
+
+    def run_stage(self, name: str, inbox: queue.Queue, outbox: queue.Queue, fn):
+        """
+        Process Documents Until the End Marker, Timing Each
+
+        After an error the stage keeps draining its inbox, so upstream
+        stages never block on a full queue.
+        """
+        while True:
+            document = inbox.get()
+            if document is None:
+                break
+            if self.error is not None:
+                continue
+
+            try:
+                if not document.get("resumed"):
+                    start_time = time.perf_counter()
+                    fn(document)
+                    self.count(
+                        name, len(document["chunks"]), time.perf_counter() - start_time
+                    )
+            except BaseException as e:
+                self.error = e
+                continue
+
+            if outbox is not None:
+                outbox.put(document)
+            else:
+                self.labels.extend(document["labels"])
+                self.keys.extend(document["keys"])
+                self.progress(document)
+
+        if outbox is not None:
+            outbox.put(None)
+
+    def count(self, stage: str, chunks: int, seconds: float, size: int = 0):
+        stats = self.stats[stage]
+        stats["documents"] += 1
+        stats["chunks"] += chunks
+        stats["bytes"] += size
+        stats["seconds"] += seconds
+
+    def progress(self, document: dict):
+        self.done += 1
+        self.resumed += bool(document.get("resumed"))
+        if self.done % self.progress_every == 0 or self.done == self.total:
+            print(
+                f"Ingested {self.done}/{self.total} documents "
+                f"({self.resumed} resumed), {len(self.labels)} chunks"
+            )
+
+    def run(self, paths: List[str]):
+        """
+        Ingest Documents, Resuming Finished Ones
+
+        Labels and cache keys of all documents, in path order, are left in
+        self.labels and self.keys.
+
+        Args:
+            paths (List[str]): Document Paths
+
+        Raises:
+            BaseException: First Error Raised by any Stage
+        """
+        self.total, self.done, self.resumed = len(paths), 0, 0
+        start_time = time.perf_counter()
+
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(
+                target=self.run_stage,
+                args=("embed", embed_queue, write_queue, self.embed),
+                name="ingest-embed",
+            ),
+            threading.Thread(
+                target=self.run_stage,
+                args=("write", write_queue, None, self.write),
+                name="ingest-write",
+            ),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            with ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                # Ordered Window of Reads, so Finished Reads Wait in the Queue
+                pending = deque()
+                for path in paths:
+                    if self.error is not None:
+                        break
+
+                    record = self.load_record(path)
+                    if record is not None:
+                        pending.append({**record, "path": path, "resumed": True})
+                    else:
+                        pending.append(
+                            pool.submit(
+                                read_and_chunk,
+                                path,
+                                self.embeddings.chunker,
+                                self.manifest_directory,
+                                self.db_mode,
+                            )
+                        )
+
+                    while len(pending) > 2 * self.workers or (
+                        pending and isinstance(pending[0], dict)
+                    ):
+                        self.feed(pending.popleft(), embed_queue)
+
+                while pending and self.error is None:
+                    self.feed(pending.popleft(), embed_queue)
+
+                for future in pending:
+                    if not isinstance(future, dict):
+                        future.cancel()
+        finally:
+            embed_queue.put(None)
+            for thread in threads:
+                thread.join()
+
+        if self.error is not None:
+            raise self.error
+
+        self.report(time.perf_counter() - start_time)
+
+    def feed(self, item, embed_queue: queue.Queue):
+        """
+        Pass a Read (or Resumed) Document to the Embed Stage
+        """
+        if isinstance(item, dict):
+            embed_queue.put(item)
+            return
+
+        try:
+            document = item.result()
+        except BaseException as e:
+            self.error = e
+            return
+
+        self.count(
+            "read", len(document["chunks"]), document["seconds"], document["bytes"]
+        )
+        self.tokens.extend(document["tokens"])
+        embed_queue.put(document)
+
+    def report(self, elapsed: float):
+        """
+        Print Per-Stage Throughput
+
+        Read time is summed over worker processes.
+        """
+        for stage, stats in self.stats.items():
+            seconds = stats["seconds"]
+            rate = stats["chunks"] / seconds if seconds > 0 else 0.0
+            size = f", {stats['bytes'] / 2**20:.1f} MB" if stats["bytes"] else ""
+            print(
+                f"Ingest {stage}: {stats['documents']} documents, "
+                f"{stats['chunks']} chunks{size} in {seconds:.2f}s "
+                f"({rate:.1f} chunks/s)"
+            )
+        if self.tokens:
+            stats = chunk_stats(self.tokens, self.embeddings.max_length)
+            print(
+                f"Ingest chunks: {stats['mean_tokens']:.0f} tokens on average "
+                f"({stats['min_tokens']}-{stats['max_tokens']}), "
+                f"{stats['truncated']} truncated, "
+                f"{self.embeddings.padding_waste:.0%} padding in batches"
+            )
+        print(
+            f"Ingested {self.total} documents ({self.resumed} resumed) "
+            f"in {elapsed:.2f}s"
+        )
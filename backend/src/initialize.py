@@ -1,20 +1,27 @@
 # src/initialize.py
+import hashlib
+import json
 import os
 
 import toml
 from dotenv import load_dotenv
 
+from .answer_cache import AnswerCache
 from .document_loader import DocumentLoader
 from .embeddings import Embeddings
+from .ingest import IngestPipeline
 from .llm import LLM
 from .rag_agent import RAGAgent
 from .retriever import Retriever
-from .vector_store import VectorStore
+from .vector_store import SEARCH_PARAMS, VectorStore
 
 
-def initialize_rag_agent():
+def load_config() -> dict:
     """
-    Initialize RAG Agent for Backend
+    Load Config for the Current ENV
+
+    Returns:
+        dict: Config Dict
     """
     # Load environment variables
     load_dotenv()
@@ -23,31 +30,109 @@ def initialize_rag_agent():
 
     # Load configuration
     with open(f"config/config.{env}.toml", "r") as file:
-        config = toml.load(file)
+        return toml.load(file)
+
+
+def get_ingest_pipeline(config: dict, embeddings: Embeddings) -> IngestPipeline:
+    """
+    Ingest Pipeline for the Configured Document Directory
+
+    Args:
+        config (dict): Config Dict
+        embeddings (Embeddings): Embeddings Object
+
+    Returns:
+        IngestPipeline: Pipeline Sharing Records and Embedding Cache
+    """
+    document_directory = config["documents"]["directory"]
+    db_mode = config["documents"].get("db_mode", False)
+
+    return IngestPipeline(
+        embeddings,
+        os.path.join(document_directory, "chunks"),
+        None if db_mode else os.path.join(document_directory, "embeddings"),
+        db_mode=db_mode,
+        **config.get("ingest", {}),
+    )
+
+
+def initialize_rag_agent():
+    """
+    Initialize RAG Agent for Backend
+    """
+    config = load_config()
 
-    model_id = config["model"]["id"]
     document_directory = config["documents"]["directory"]
-    embedding_directory = os.path.join(document_directory, "embeddings")
+    index_directory = os.path.join(document_directory, "index")
+    index_config = config.get("vector_store", {})
+    db_mode = config["documents"].get("db_mode", False)
 
     # Initialize components
-    loader = DocumentLoader(document_directory)
-    titles, documents = loader.load_documents()
+    loader = DocumentLoader(document_directory, db_mode=db_mode)
 
     huggingface_api_key = os.getenv("HUGGINGFACE_API_KEY")
     if not huggingface_api_key:
         raise ValueError("HUGGINGFACE_API_KEY not found in environment variables")
 
-    embeddings = Embeddings(model_id=model_id, HUGGINGFACE_API_KEY=huggingface_api_key)
+    embeddings = Embeddings.from_config(config, huggingface_api_key, db_mode=db_mode)
 
-    document_embeddings, chunked_texts_with_titles = embeddings.get_embeddings(
-        titles, documents, embedding_directory=embedding_directory
-    )
+    # One Storage Precision for Embedding Cache, Database and Index
+    index_config = {**index_config, "precision": embeddings.precision}
+
+    if db_mode:
+        # Ingest New Documents, Train on a Sample of the Whole Database, then
+        # Stream all Stored Embeddings into FAISS
+        get_ingest_pipeline(config, embeddings).run(loader.paths())
+
+        vector_store = VectorStore(embeddings.dimension, index_config)
+        vector_store.train(
+            embeddings.sample_embeddings_db(vector_store.index_config["train_size"])
+        )
+        for chunked_texts_with_titles, block in embeddings.iter_embeddings_db():
+            vector_store.add_documents(chunked_texts_with_titles, block)
 
-    embedding_dimension = len(document_embeddings[0])
-    vector_store = VectorStore(dimension=embedding_dimension)
-    vector_store.add_documents(chunked_texts_with_titles, document_embeddings)
+    else:
+        # Reuse Index Snapshot while Documents, Model and Index are Unchanged
+        build_config = {k: v for k, v in index_config.items() if k not in SEARCH_PARAMS}
+        fingerprint = hashlib.sha256(
+            json.dumps(
+                [
+                    loader.fingerprint(),
+                    embeddings.signature,
+                    embeddings.chunker.settings,
+                    build_config,
+                ],
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+        vector_store = VectorStore.load(index_directory, fingerprint, index_config)
+
+        if vector_store is None:
+            pipeline = get_ingest_pipeline(config, embeddings)
+            pipeline.run(loader.paths())
+
+            vector_store = VectorStore(embeddings.dimension, index_config)
+            vector_store.add_documents(
+                pipeline.labels, pipeline.store.get(pipeline.keys)
+            )
+            vector_store.save(index_directory, fingerprint)
 
     retriever = Retriever(vector_store, embeddings)
-    llm = LLM(config["llm"]["api_url"])
+    llm = LLM(config["llm"]["api_url"], **config.get("conversation", {}))
+
+    answer_cache = None
+    cache_config = config.get("answer_cache", {})
+    if cache_config.get("enabled", False):
+        answer_cache = AnswerCache(
+            max_size=cache_config.get("max_size", 1024),
+            threshold=cache_config.get("threshold", 0.99),
+            directory=(
+                os.path.join(document_directory, "answer_cache")
+                if cache_config.get("persist", False)
+                else None
+            ),
+            signature=embeddings.signature,
+            save_interval_seconds=cache_config.get("save_interval_seconds", 60),
+        )
 
-    return RAGAgent(retriever=retriever, llm=llm)
+    return RAGAgent(retriever=retriever, llm=llm, answer_cache=answer_cache)
@@ -1,44 +1,158 @@
-from openai import OpenAI
+from typing import AsyncIterator, Iterator, List
+
+from openai import AsyncOpenAI, OpenAI
+
+from .conversation import ConversationStore
 
 
 class LLM:
-    def __init__(self, base_url):
+    def __init__(
+        self,
+        base_url,
+        max_history_tokens: int = 1024,
+        max_sessions: int = 1000,
+        session_ttl_seconds: float = 3600,
+    ):
         """
         LLM Object for Llamafile API Calls
 
         Args:
             base_url (_type_): API URL of Llamafile
+            max_history_tokens (int, optional): History Tokens Replayed per
+                Request. Defaults to 1024.
+            max_sessions (int, optional): Conversations Kept. Defaults to 1000.
+            session_ttl_seconds (float, optional): Idle Seconds Before a
+                Conversation is Dropped. Defaults to 3600.
         """
         self.client = OpenAI(base_url=base_url, api_key="sk-no-key-required")
+        self.async_client = AsyncOpenAI(base_url=base_url, api_key="sk-no-key-required")
         self.model = "LLaMA_CPP"
-        self.messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are ChatGPT, an AI assistant. "
-                    "Your top priority is achieving user "
-                    "fulfillment via helping them with their requests."
-                ),
-            }
-        ]
-
-    def generate(self, prompt: str) -> str:
+        self.system_message = {
+            "role": "system",
+            "content": (
+                "You are ChatGPT, an AI assistant. "
+                "Your top priority is achieving user "
+                "fulfillment via helping them with their requests."
+            ),
+        }
+        self.conversations = ConversationStore(
+            max_history_tokens, max_sessions, session_ttl_seconds
+        )
+
+    @property
+    def messages(self) -> List[dict]:
+        """
+        System Message and Default Session History
+
+        Returns:
+            List[dict]: Chat Messages
+        """
+        return [self.system_message] + self.conversations.get_history()
+
+    def generate(self, prompt: str, session_id: str = None) -> str:
         """
         Call to Llamafile for LLM Response
         Args:
             prompt (str): LLM prompt.
+            session_id (str, optional): Conversation to continue. Defaults to
+                the shared default conversation.
 
         Returns:
             str: LLM response.
         """
-        self.messages.append({"role": "user", "content": prompt})
+        messages = self.conversations.get_messages(
+            session_id, self.system_message, prompt
+        )
 
         completion = self.client.chat.completions.create(
-            model=self.model, messages=self.messages
+            model=self.model, messages=messages
+        )
+
+        response = completion.choices[0].message.content
+
+        self.conversations.append(session_id, prompt, response)
+
+        return response
+
+    async def agenerate(self, prompt: str, session_id: str = None) -> str:
+        """
+        Call to Llamafile for LLM Response without Blocking the Event Loop
+        Args:
+            prompt (str): LLM prompt.
+            session_id (str, optional): Conversation to continue. Defaults to
+                the shared default conversation.
+
+        Returns:
+            str: LLM response.
+        """
+        messages = self.conversations.get_messages(
+            session_id, self.system_message, prompt
+        )
+
+        completion = await self.async_client.chat.completions.create(
+            model=self.model, messages=messages
         )
 
         response = completion.choices[0].message.content
 
-        self.messages.append({"role": "assistant", "content": response})
+        self.conversations.append(session_id, prompt, response)
 
         return response
+
+    def generate_stream(self, prompt: str, session_id: str = None) -> Iterator[str]:
+        """
+        Stream LLM Response Tokens from Llamafile
+        Args:
+            prompt (str): LLM prompt.
+            session_id (str, optional): Conversation to continue. Defaults to
+                the shared default conversation.
+
+        Yields:
+            str: Response token text, in order.
+        """
+        messages = self.conversations.get_messages(
+            session_id, self.system_message, prompt
+        )
+
+        stream = self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=True
+        )
+
+        response = []
+        for chunk in stream:
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if token:
+                response.append(token)
+                yield token
+
+        self.conversations.append(session_id, prompt, "".join(response))
+
+    async def agenerate_stream(
+        self, prompt: str, session_id: str = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream LLM Response Tokens without Blocking the Event Loop
+        Args:
+            prompt (str): LLM prompt.
+            session_id (str, optional): Conversation to continue. Defaults to
+                the shared default conversation.
+
+        Yields:
+            str: Response token text, in order.
+        """
+        messages = self.conversations.get_messages(
+            session_id, self.system_message, prompt
+        )
+
+        stream = await self.async_client.chat.completions.create(
+            model=self.model, messages=messages, stream=True
+        )
+
+        response = []
+        async for chunk in stream:
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if token:
+                response.append(token)
+                yield token
+
+        self.conversations.append(session_id, prompt, "".join(response))
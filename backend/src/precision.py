@@ -0,0 +1,118 @@
+import numpy as np
+
+# Storage Precisions of Embeddings (Cache, Database and Index)
+PRECISIONS = ("float32", "float16", "int8")
+
+# Bytes of the Per-Vector Scale Stored before int8 Codes
+SCALE_BYTES = 4
+
+
+def check_precision(precision: str):
+    """
+    Check that a Precision is Supported
+
+    Args:
+        precision (str): "float32", "float16" or "int8"
+
+    Raises:
+        ValueError: Unknown Precision
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unknown precision {precision!r}, expected one of {', '.join(PRECISIONS)}"
+        )
+
+
+def row_bytes(dimension: int, precision: str) -> int:
+    """
+    Stored Bytes per Vector
+
+    Args:
+        dimension (int): Embedding Dimension
+        precision (str): "float32", "float16" or "int8"
+
+    Returns:
+        int: Bytes per Row
+    """
+    check_precision(precision)
+    if precision == "float32":
+        return 4 * dimension
+    if precision == "float16":
+        return 2 * dimension
+    return SCALE_BYTES + dimension
+
+
+def encode_vectors(embeddings: np.ndarray, precision: str) -> np.ndarray:
+    """
+    Convert Embeddings to their Stored Bytes
+
+    int8 rows are scaled symmetrically by their largest absolute value,
+    the float32 scale is stored in front of the codes.
+
+    Args:
+        embeddings (np.ndarray): (n, dimension) Embeddings
+        precision (str): "float32", "float16" or "int8"
+
+    Returns:
+        np.ndarray: (n, row_bytes) uint8 Rows
+    """
+    check_precision(precision)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    embeddings = embeddings.reshape(-1, embeddings.shape[-1])
+
+    if precision == "float32":
+        rows = np.ascontiguousarray(embeddings)
+    elif precision == "float16":
+        rows = embeddings.astype(np.float16)
+    else:
+        scale = np.abs(embeddings).max(axis=1, keepdims=True) / 127
+        scale = scale.clip(min=1e-12).astype(np.float32)
+        codes = np.rint(embeddings / scale).clip(-127, 127).astype(np.int8)
+        return np.concatenate([scale.view(np.uint8), codes.view(np.uint8)], axis=1)
+
+    return rows.view(np.uint8)
+
+
+def decode_vectors(rows: np.ndarray, precision: str) -> np.ndarray:
+    """
+    Convert Stored Bytes Back to float32 Embeddings
+
+    Args:
+        rows (np.ndarray): (n, row_bytes) uint8 Rows
+        precision (str): "float32", "float16" or "int8"
+
+    Returns:
+        np.ndarray: (n, dimension) float32 Embeddings
+    """
+    check_precision(precision)
+    rows = np.ascontiguousarray(rows, dtype=np.uint8)
+
+    if precision == "float32":
+        return rows.view(np.float32)
+    if precision == "float16":
+        return rows.view(np.float16).astype(np.float32)
+
+    scale = rows[:, :SCALE_BYTES].view(np.float32)
+    return rows[:, SCALE_BYTES:].view(np.int8) * scale
+
+
+def decode_bytes(data: bytes, dimension: int) -> np.ndarray:
+    """
+    Decode One Stored Vector, Inferring its Precision from its Length
+
+    Lets rows written with different precisions live side by side, e.g.
+    in the database after the setting changed.
+
+    Args:
+        data (bytes): Stored Row
+        dimension (int): Embedding Dimension
+
+    Returns:
+        np.ndarray: (dimension,) float32 Embedding
+    """
+    for precision in PRECISIONS:
+        if len(data) == row_bytes(dimension, precision):
+            row = np.frombuffer(data, dtype=np.uint8).reshape(1, -1)
+            return decode_vectors(row, precision)[0]
+
+    raise ValueError(f"{len(data)} bytes is not a stored {dimension}-d embedding")
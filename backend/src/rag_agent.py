@@ -1,41 +1,257 @@
+import asyncio
+from typing import AsyncIterator, Iterator, List, Tuple
+
+import numpy as np
+
+from .answer_cache import AnswerCache, context_key
 from .llm import LLM
 from .retriever import Retriever
 
 
 class RAGAgent:
-    def __init__(self, retriever: Retriever, llm: LLM):
+    def __init__(
+        self,
+        retriever: Retriever,
+        llm: LLM,
+        k: int = 2,
+        answer_cache: AnswerCache = None,
+    ):
         """
         RAG Agent
 
         Args:
             retriever (Retriever):
             llm (LLM): _description_
+            k (int, optional): Chunks of Context per Query. Defaults to 2.
+            answer_cache (AnswerCache, optional): Reuse Answers for Similar
+                Queries with the Same Context. Defaults to None.
         """
         self.retriever = retriever
         self.llm = llm
+        self.k = k
+        self.answer_cache = answer_cache
 
-    def get_prompt(self, query: str) -> str:
+    def get_prompt(self, query: str, context: List[str] = None) -> str:
         """
         Generate Prompt for Query and Embeddings
         Args:
             query (str): User Query
+            context (List[str], optional): Retrieved Chunks. Retrieved for
+                the query if not given.
 
         Returns:
             str: LLM Prompt
         """
-        context = self.retriever.retrieve(query, k=2)
+        if context is None:
+            context = self.retriever.retrieve(query, k=self.k)
         context = " ".join(context)
         prompt = f"Context: {''.join(context)}\n\nQuestion: {query}\n\nAnswer:"
         return prompt
 
-    def answer(self, query: str) -> str:
+    def get_context(
+        self, query: str, context: List[str] = None, chunk_ids: List[int] = None
+    ) -> Tuple[List[str], List[int]]:
+        """
+        Retrieve Context Unless Given
+
+        Args:
+            query (str): User Query
+            context (List[str], optional): Retrieved Chunks. Defaults to None.
+            chunk_ids (List[int], optional): Retrieved Chunk IDs. Defaults to None.
+
+        Returns:
+            Tuple[List[str], List[int]]: Chunks and Chunk IDs (None if unknown)
+        """
+        if context is not None:
+            return context, chunk_ids
+
+        results = self.retriever.retrieve_batch([query], self.k)[0]
+        return [result.text for result in results], [
+            result.chunk_id for result in results
+        ]
+
+    def lookup(
+        self,
+        query: str,
+        context: List[str],
+        chunk_ids: List[int],
+        session_id: str = None,
+    ) -> Tuple[np.ndarray, str, str]:
+        """
+        Look Up a Cached Answer
+
+        Args:
+            query (str): User Query
+            context (List[str]): Retrieved Chunks
+            chunk_ids (List[int]): Retrieved Chunk IDs
+            session_id (str, optional): Conversation the Answer Continues,
+                its History is Part of the Key. Defaults to None.
+
+        Returns:
+            Tuple[np.ndarray, str, str]: Query Embedding, Context Key and
+                Cached Answer. All None if caching is off or chunk ids are
+                unknown, answer None on a miss.
+        """
+        if self.answer_cache is None or chunk_ids is None:
+            return None, None, None
+
+        embedding = self.retriever.embeddings.get_embeddings_query([query])[0]
+        key = context_key(
+            chunk_ids, context, self.llm.conversations.get_history(session_id)
+        )
+        return embedding, key, self.answer_cache.get(embedding, key)
+
+    def _hit(self, prompt: str, answer: str, session_id: str):
+        """
+        Record a Cached Answer in the Conversation
+        """
+        print(f"Answer cache hit ({self.answer_cache.stats()['hit_rate']:.0%})")
+        self.llm.conversations.append(session_id, prompt, answer)
+
+    def answer(
+        self,
+        query: str,
+        context: List[str] = None,
+        session_id: str = None,
+        chunk_ids: List[int] = None,
+    ) -> str:
         """
         Get LLM Response
         Args:
             query (str): User Query
+            context (List[str], optional): Retrieved Chunks. Retrieved for
+                the query if not given.
+            session_id (str, optional): Conversation to Continue. Defaults to
+                the shared default conversation.
+            chunk_ids (List[int], optional): IDs of the Given Chunks, Needed
+                for the Answer Cache. Defaults to None.
 
         Returns:
             str: LLM Response
         """
-        prompt = self.get_prompt(query)
-        return self.llm.generate(prompt)
+        context, chunk_ids = self.get_context(query, context, chunk_ids)
+        embedding, key, cached = self.lookup(query, context, chunk_ids, session_id)
+
+        prompt = self.get_prompt(query, context)
+        if cached is not None:
+            self._hit(prompt, cached, session_id)
+            return cached
+
+        response = self.llm.generate(prompt, session_id)
+        if key is not None:
+            self.answer_cache.put(embedding, key, response)
+        return response
+
+    async def aanswer(
+        self,
+        query: str,
+        context: List[str] = None,
+        session_id: str = None,
+        chunk_ids: List[int] = None,
+    ) -> str:
+        """
+        Get LLM Response without Blocking the Event Loop
+        Args:
+            query (str): User Query
+            context (List[str]): Retrieved Chunks. Must be given if called
+                on the event loop, retrieval itself is blocking.
+            session_id (str, optional): Conversation to Continue. Defaults to
+                the shared default conversation.
+            chunk_ids (List[int], optional): IDs of the Given Chunks, Needed
+                for the Answer Cache. Defaults to None.
+
+        Returns:
+            str: LLM Response
+        """
+        embedding, key, cached = await asyncio.to_thread(
+            self.lookup, query, context, chunk_ids, session_id
+        )
+
+        prompt = self.get_prompt(query, context)
+        if cached is not None:
+            self._hit(prompt, cached, session_id)
+            return cached
+
+        response = await self.llm.agenerate(prompt, session_id)
+        if key is not None:
+            await asyncio.to_thread(self.answer_cache.put, embedding, key, response)
+        return response
+
+    def answer_stream(
+        self,
+        query: str,
+        context: List[str] = None,
+        session_id: str = None,
+        chunk_ids: List[int] = None,
+    ) -> Iterator[str]:
+        """
+        Stream LLM Response Tokens
+        Args:
+            query (str): User Query
+            context (List[str], optional): Retrieved Chunks. Retrieved for
+                the query if not given.
+            session_id (str, optional): Conversation to Continue. Defaults to
+                the shared default conversation.
+            chunk_ids (List[int], optional): IDs of the Given Chunks, Needed
+                for the Answer Cache. Defaults to None.
+
+        Yields:
+            str: LLM Response Tokens, a Cached Answer is Sent Whole
+        """
+        context, chunk_ids = self.get_context(query, context, chunk_ids)
+        embedding, key, cached = self.lookup(query, context, chunk_ids, session_id)
+
+        prompt = self.get_prompt(query, context)
+        if cached is not None:
+            self._hit(prompt, cached, session_id)
+            yield cached
+            return
+
+        tokens = []
+        for token in self.llm.generate_stream(prompt, session_id):
+            tokens.append(token)
+            yield token
+
+        if key is not None:
+            self.answer_cache.put(embedding, key, "".join(tokens))
+
+    async def aanswer_stream(
+        self,
+        query: str,
+        context: List[str] = None,
+        session_id: str = None,
+        chunk_ids: List[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream LLM Response Tokens without Blocking the Event Loop
+        Args:
+            query (str): User Query
+            context (List[str]): Retrieved Chunks. Must be given if called
+                on the event loop, retrieval itself is blocking.
+            session_id (str, optional): Conversation to Continue. Defaults to
+                the shared default conversation.
+            chunk_ids (List[int], optional): IDs of the Given Chunks, Needed
+                for the Answer Cache. Defaults to None.
+
+        Yields:
+            str: LLM Response Tokens, a Cached Answer is Sent Whole
+        """
+        embedding, key, cached = await asyncio.to_thread(
+            self.lookup, query, context, chunk_ids, session_id
+        )
+
+        prompt = self.get_prompt(query, context)
+        if cached is not None:
+            self._hit(prompt, cached, session_id)
+            yield cached
+            return
+
+        tokens = []
+        async for token in self.llm.agenerate_stream(prompt, session_id):
+            tokens.append(token)
+            yield token
+
+        if key is not None:
+            await asyncio.to_thread(
+                self.answer_cache.put, embedding, key, "".join(tokens)
+            )
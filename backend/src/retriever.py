@@ -1,7 +1,9 @@
-from typing import List
+from typing import List, Optional
+
+import numpy as np
 
 from .embeddings import Embeddings
-from .vector_store import VectorStore
+from .vector_store import SearchResult, VectorStore
 
 
 class Retriever:
@@ -16,6 +18,40 @@ class Retriever:
         self.vector_store = vector_store
         self.embeddings = embeddings
 
-    def retrieve(self, query: str, k: int) -> List[str]:
-        query_embedding = self.embeddings.get_embeddings_query([query])[0]
-        return self.vector_store.search(query_embedding, k)
+    def retrieve(self, query: str, k: int, document: str = None) -> List[str]:
+        """
+        Retrieve Chunks for Query
+
+        Args:
+            query (str): User Query
+            k (int): Number of Chunks to Return
+            document (str, optional): Document Title to Search within.
+                Defaults to None, all Documents.
+
+        Returns:
+            List[str]: List of Chunks
+        """
+        return [
+            result.text for result in self.retrieve_batch([query], k, [document])[0]
+        ]
+
+    def retrieve_batch(
+        self, queries: List[str], k: int, documents: List[Optional[str]] = None
+    ) -> List[List[SearchResult]]:
+        """
+        Retrieve Chunks for Many Queries
+
+        Queries are embedded in one padded forward pass and searched with
+        one FAISS call per document scope.
+
+        Args:
+            queries (List[str]): User Queries
+            k (int): Number of Chunks to Return per Query
+            documents (List[Optional[str]], optional): Document Title to
+                Search within per Query. Defaults to None, all Documents.
+
+        Returns:
+            List[List[SearchResult]]: Chunk IDs, Distances and Chunks per Query
+        """
+        query_embeddings = np.asarray(self.embeddings.get_embeddings_query(queries))
+        return self.vector_store.search_batch(query_embeddings, k, documents)
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = None):
+        """
+        Thread-Safe LRU Cache with Idle Expiry
+
+        Entries are evicted least recently used first once max_size is
+        reached, and dropped when not read or written for ttl_seconds.
+
+        Args:
+            max_size (int, optional): Max Entries. Defaults to 1024.
+            ttl_seconds (float, optional): Idle Seconds Before an Entry
+                Expires, None to Never Expire. Defaults to None.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _expired(self, timestamp: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - timestamp > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get Entry and Mark it Recently Used
+
+        Args:
+            key (Hashable): Entry Key
+            default (Any, optional): Returned on Miss. Defaults to None.
+
+        Returns:
+            Any: Cached Value or Default
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or self._expired(entry[0], now):
+                self.entries.pop(key, None)
+                self.misses += 1
+                return default
+
+            self.entries[key] = (now, entry[1])
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Add or Replace Entry, Evicting Expired then Least Recently Used
+
+        Args:
+            key (Hashable): Entry Key
+            value (Any): Value
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            self.entries[key] = (now, value)
+            self.entries.move_to_end(key)
+
+            # Oldest First, so Expired Entries are at the Front
+            while self.entries:
+                oldest_key, (timestamp, _) = next(iter(self.entries.items()))
+                if len(self.entries) <= self.max_size and not self._expired(
+                    timestamp, now
+                ):
+                    break
+                del self.entries[oldest_key]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove Entry
+
+        Args:
+            key (Hashable): Entry Key
+            default (Any, optional): Returned if Missing. Defaults to None.
+
+        Returns:
+            Any: Removed Value or Default
+        """
+        with self.lock:
+            entry = self.entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        """
+        Remove all Entries
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Hit and Miss Counters
+
+        Returns:
+            dict: size, hits, misses and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
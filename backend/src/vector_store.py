@@ -1,49 +1,698 @@
-from typing import List
+import json
+import os
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import faiss
 import numpy as np
 
+from .chunk_store import ChunkStore
+from .concurrency import ReadWriteLock
+
+# Bump when the Snapshot Layout Changes
+SNAPSHOT_VERSION = 4
+
+# Default [vector_store] Settings
+INDEX_DEFAULTS = {
+    "index": "flat",
+    "nlist": 1024,
+    "pq_m": 64,
+    "pq_nbits": 8,
+    "hnsw_m": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+    "nprobe": 16,
+    "train_size": 50000,
+    "precision": "float32",
+    "projection": "none",
+    "projection_dimension": 256,
+}
+
+# Vector Codes per Storage Precision, int8 is Trained per Dimension
+CODECS = {"float32": "Flat", "float16": "SQfp16", "int8": "SQ8"}
+
+# Trained Projections Applied before the Index, in Front of Stored and Query
+# Vectors Alike
+PROJECTIONS = ("none", "pca", "opq")
+
+# Settings Applied at Query Time, Changing them Needs no Rebuild
+SEARCH_PARAMS = ("nprobe", "ef_search")
+
+
+class SearchResult(NamedTuple):
+    """Single Search Hit"""
+
+    chunk_id: int
+    distance: float
+    text: str
+
+
+def find_hnsw(index: faiss.Index) -> Optional[faiss.IndexHNSW]:
+    """
+    Unwrap ID Maps and Transforms to Reach an HNSW Index
+
+    Args:
+        index (faiss.Index): Index
+
+    Returns:
+        Optional[faiss.IndexHNSW]: HNSW Index, or None
+    """
+    index = faiss.downcast_index(index)
+    while hasattr(index, "index") and not isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.index)
+    return index if isinstance(index, faiss.IndexHNSW) else None
+
 
 class VectorStore:
-    def __init__(self, dimension: int):
+    def __init__(self, dimension: int, index_config: dict = None):
         """
         Store Document and Chunk Embeddings
 
         Args:
             dimension (int): FAISS Dimension
+            index_config (dict, optional): [vector_store] Settings. Index is
+                one of "flat", "ivf_flat", "ivf_pq" or "hnsw". Defaults to flat.
+                Precision ("float32", "float16" or "int8") sets how flat,
+                ivf_flat and hnsw store vectors, ivf_pq is always compressed.
+                Projection ("none", "pca" or "opq") reduces vectors to
+                projection_dimension before they are indexed, it is trained
+                on the corpus, saved with the index and applied to queries.
+        """
+        self.dimension = dimension
+        self.index_config = {**INDEX_DEFAULTS, **(index_config or {})}
+        self.documents = ChunkStore()
+        self.mmap_path = None
+
+        # Stable Chunk IDs, Parallel to documents, Ascending
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.next_id = 0
+
+        # Indexed Titles, Replaced Whole after Updates so Readers Need no Lock
+        self.titles = frozenset()
+
+        # Updates Run One at a Time (lock) and Prepare New Indexes Aside.
+        # Searches Share rw_lock, Updates Take it Alone only to Change the
+        # Index and Chunks, so Searches Run in Parallel and are not Blocked
+        # by Index Reads or Rebuilds.
+        self.lock = threading.RLock()
+        self.rw_lock = ReadWriteLock()
+
+        if self.index_config["precision"] not in CODECS:
+            raise ValueError(f"Unknown precision: {self.index_config['precision']}")
+
+        projection = self.index_config["projection"]
+        if projection not in PROJECTIONS:
+            raise ValueError(f"Unknown projection: {projection}")
+
+        # OPQ Rotates PQ Sub-Vectors, and PQ Splits the Projected Vector
+        if (
+            projection == "opq"
+            or (projection == "pca" and self.index_config["index"] == "ivf_pq")
+        ) and self.index_config["projection_dimension"] % self.index_config["pq_m"]:
+            raise ValueError("projection_dimension must be a multiple of pq_m")
+
+        # IVF, int8 and Projected Indexes are Built on the First Add, once
+        # there is Data to Train on
+        self.index = None
+        if (
+            self.index_config["index"] in ("flat", "hnsw")
+            and self.index_config["precision"] != "int8"
+            and projection == "none"
+        ):
+            self.index = self.build_index(np.zeros((0, dimension), dtype=np.float32))
+
+    def factory_string(self, train_size: int) -> str:
+        """
+        FAISS index_factory Description for the Configured Index
+
+        Args:
+            train_size (int): Number of Training Vectors Available
+
+        Returns:
+            str: index_factory String
+        """
+        config = self.index_config
+        index_type = config["index"]
+        codec = CODECS[config["precision"]]
+        prefix = self.projection_prefix(train_size)
+
+        if index_type == "flat":
+            return prefix + codec
+
+        if index_type == "hnsw":
+            if codec == "Flat":
+                return f"{prefix}HNSW{config['hnsw_m']}"
+            return f"{prefix}HNSW{config['hnsw_m']},{codec}"
+
+        if index_type not in ("ivf_flat", "ivf_pq"):
+            raise ValueError(f"Unknown index type: {index_type}")
+
+        # Too Little Data to Train Clusters, Fall Back to Exact Search
+        nlist = min(config["nlist"], train_size // 39)
+        if nlist < 1 or (
+            index_type == "ivf_pq" and train_size < 2 ** config["pq_nbits"]
+        ):
+            print(
+                f"Warning: {train_size} vectors are too few to train "
+                f"{index_type}, using a flat index."
+            )
+            return prefix + codec
+
+        if index_type == "ivf_flat":
+            return f"{prefix}IVF{nlist},{codec}"
+
+        return f"{prefix}IVF{nlist},PQ{config['pq_m']}x{config['pq_nbits']}"
+
+    def projection_prefix(self, train_size: int) -> str:
+        """
+        index_factory Prefix of the Configured Projection
+
+        Args:
+            train_size (int): Number of Training Vectors Available
+
+        Returns:
+            str: "PCA{d}," or "OPQ{m}_{d},", Empty without Projection
+        """
+        config = self.index_config
+        projection = config["projection"]
+        dimension = config["projection_dimension"]
+
+        if projection == "none" or dimension >= self.dimension:
+            return ""
+
+        # Components Need More Vectors than Dimensions, OPQ also Trains
+        # 256 Centroids per Sub-Vector
+        min_size = dimension if projection == "pca" else max(dimension, 256)
+        if train_size < min_size:
+            if train_size:
+                print(
+                    f"Warning: {train_size} vectors are too few to train "
+                    f"{projection}, indexing without projection."
+                )
+            return ""
+
+        if projection == "pca":
+            return f"PCA{dimension},"
+        return f"OPQ{config['pq_m']}_{dimension},"
+
+    def build_index(self, embeddings: np.ndarray) -> faiss.Index:
+        """
+        Create and Train the Configured Index
+
+        Args:
+            embeddings (np.ndarray): Vectors to Train on (a Sample is Used)
+
+        Returns:
+            faiss.Index: Trained, Empty Index
+        """
+        config = self.index_config
+
+        sample = embeddings
+        if len(sample) > config["train_size"]:
+            rows = np.random.default_rng(0).choice(
+                len(sample), config["train_size"], replace=False
+            )
+            sample = sample[np.sort(rows)]
+
+        index = faiss.index_factory(self.dimension, self.factory_string(len(sample)))
+
+        hnsw = find_hnsw(index)
+        if hnsw is not None:
+            hnsw.hnsw.efConstruction = config["ef_construction"]
+
+        if not index.is_trained and len(sample):
+            index.train(sample)
+
+        # IVF Lists Store IDs Themselves, other Indexes Need an ID Map to
+        # Add and Remove by ID. Both Read Vectors Back by ID for Scoped
+        # Searches.
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is None:
+            index = faiss.IndexIDMap2(index)
+        else:
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+        self.set_search_params(index)
+        return index
+
+    def set_search_params(self, index: faiss.Index = None):
         """
-        self.index = faiss.IndexFlatL2(dimension)
-        self.documents = []
+        Apply Query-Time Settings (nprobe, efSearch)
 
-    def add_documents(self, documents: List[str], embeddings: List[np.ndarray]):
+        Args:
+            index (faiss.Index, optional): Index to Tune. Defaults to self.index.
+        """
+        index = index or self.index
+
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = self.index_config["nprobe"]
+
+        hnsw = find_hnsw(index)
+        if hnsw is not None:
+            hnsw.hnsw.efSearch = self.index_config["ef_search"]
+
+    def save(self, directory: str, fingerprint: str):
+        """
+        Save Index and Documents as a Versioned Snapshot
+
+        Args:
+            directory (str): Snapshot Directory
+            fingerprint (str): Corpus and Model Fingerprint
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        if self.index is None:
+            self.index = self.build_index(np.zeros((0, self.dimension), np.float32))
+
+        # Invalidate the Old Snapshot First, so a Crash while Writing Never
+        # Leaves a Mix of Old and New Files Treated as Valid
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        with self.lock:
+            # Replaced, not Overwritten, as the Old Index may be Mapped
+            index_path = os.path.join(directory, "index.faiss")
+            faiss.write_index(self.index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+
+            self.documents.save(directory)
+            np.save(os.path.join(directory, "ids.npy"), self.ids)
+            ntotal, next_id = self.index.ntotal, self.next_id
+
+        # Metadata Last, so a Partial Snapshot is Never Treated as Valid
+        with open(meta_path + ".tmp", "w") as file:
+            json.dump(
+                {
+                    "version": SNAPSHOT_VERSION,
+                    "fingerprint": fingerprint,
+                    "ntotal": ntotal,
+                    "next_id": next_id,
+                },
+                file,
+            )
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @classmethod
+    def load(
+        cls, directory: str, fingerprint: str, index_config: dict = None
+    ) -> Optional["VectorStore"]:
+        """
+        Load Snapshot if it Matches the Fingerprint
+
+        The index and the chunk text are memory-mapped. The index is only
+        read into memory if documents are added or removed later.
+
+        Args:
+            directory (str): Snapshot Directory
+            fingerprint (str): Corpus and Model Fingerprint
+            index_config (dict, optional): [vector_store] Settings. Defaults to None.
+
+        Returns:
+            Optional[VectorStore]: Vector Store, or None if Missing or Stale
+        """
+        meta_path = os.path.join(directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path, "r") as file:
+            meta = json.load(file)
+
+        if (
+            meta.get("version") != SNAPSHOT_VERSION
+            or meta.get("fingerprint") != fingerprint
+        ):
+            return None
+
+        index_path = os.path.join(directory, "index.faiss")
+        try:
+            index = faiss.read_index(
+                index_path,
+                faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0),
+            )
+        except RuntimeError:
+            # IVF Lists can only be Mapped without Flat Code Mapping
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+        if index.ntotal != meta["ntotal"]:
+            return None
+
+        vector_store = cls(index.d, index_config)
+        vector_store.index = index
+        vector_store.mmap_path = index_path
+        vector_store.set_search_params()
+        vector_store.documents = ChunkStore.load(directory)
+        vector_store.ids = np.load(os.path.join(directory, "ids.npy"))
+        vector_store.update_titles()
+        vector_store.next_id = meta["next_id"]
+
+        return vector_store
+
+    def writable_index(self) -> faiss.Index:
+        """
+        Index that can be Changed
+
+        Memory-mapped indexes are read-only, so the snapshot is read into
+        memory first. Call with self.lock held.
+
+        Returns:
+            faiss.Index: In-Memory Index
+        """
+        if self.mmap_path:
+            index = faiss.read_index(self.mmap_path)
+            self.set_search_params(index)
+            with self.rw_lock.write():
+                self.index = index
+            self.mmap_path = None
+        return self.index
+
+    def train(self, sample: np.ndarray):
+        """
+        Build the Index from a Training Sample before any Add
+
+        IVF, int8 and projected indexes otherwise train on the first
+        add_documents call. When the corpus is streamed in blocks, train on
+        a sample drawn from the whole corpus first, so the index does not
+        learn only the first block. Does nothing once the index exists.
+
+        Args:
+            sample (np.ndarray): Training Vectors from across the Corpus
+        """
+        sample = np.asarray(sample, dtype=np.float32)
+
+        with self.lock:
+            if self.index is not None or len(sample) == 0:
+                return
+
+            index = self.build_index(sample)
+            with self.rw_lock.write():
+                self.index = index
+
+    def add_documents(
+        self, documents: List[str], embeddings: List[np.ndarray]
+    ) -> List[int]:
         """
         Add Documents, Embeddings to Vector Store
 
         Args:
             documents (List[str]): List of Documents
-            embeddings (List[np.ndarray]): List of Document Embeddings
+            embeddings (List[np.ndarray]): List or Matrix of Document Embeddings
+
+        Returns:
+            List[int]: Chunk IDs of the Added Documents
         """
-        embeddings_array = np.array(embeddings, dtype=np.float32)
+        embeddings_array = np.asarray(embeddings, dtype=np.float32)
 
-        if embeddings_array.shape[0] > 0:
-            self.index.add(embeddings_array)
-            self.documents.extend(documents)
-        else:
+        if embeddings_array.shape[0] == 0:
             print("Warning: No embeddings to add to the index.")
+            return []
+
+        with self.lock:
+            if self.index is None:
+                index = self.build_index(embeddings_array)
+                with self.rw_lock.write():
+                    self.index = index
+
+            index = self.writable_index()
+            ids = np.arange(self.next_id, self.next_id + len(documents))
 
-    def search(self, query_embedding: np.ndarray, k: int) -> List[str]:
+            with self.rw_lock.write():
+                index.add_with_ids(embeddings_array, ids)
+                self.documents.extend(documents)
+                self.ids = np.concatenate([self.ids, ids])
+            self.next_id += len(ids)
+            self.update_titles()
+
+        return ids.tolist()
+
+    def rows_for_ids(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Positions of Chunk IDs in documents
+
+        Args:
+            ids (np.ndarray): Chunk IDs, all Present
+
+        Returns:
+            np.ndarray: Rows
+        """
+        return np.searchsorted(self.ids, ids)
+
+    def remove_ids(self, ids: List[int]) -> int:
+        """
+        Remove Chunks by ID
+
+        Args:
+            ids (List[int]): Chunk IDs
+
+        Returns:
+            int: Number of Chunks Removed
+        """
+        with self.lock:
+            removed = np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+            if not removed.any():
+                return 0
+
+            index = self.writable_index()
+            keep = self.ids[~removed]
+
+            # HNSW Graphs can not Remove Nodes, Rebuild from Kept Vectors
+            # while Searches Continue on the Current Index
+            if find_hnsw(index) is not None:
+                vectors = index.reconstruct_batch(keep)
+                index = self.build_index(vectors)
+                index.add_with_ids(vectors, keep)
+
+            with self.rw_lock.write():
+                if index is self.index:
+                    index.remove_ids(self.ids[removed])
+                self.index = index
+                self.documents.keep(~removed)
+                self.ids = keep
+            self.update_titles()
+
+        return int(removed.sum())
+
+    def document_chunks(self, title: str) -> Dict[int, str]:
+        """
+        Chunks of One Document
+
+        Args:
+            title (str): Document Title (Document ID)
+
+        Returns:
+            Dict[int, str]: Chunk ID to Chunk
+        """
+        with self.rw_lock.read():
+            return {
+                int(self.ids[row]): self.documents[row]
+                for row in self.documents.document_rows(title)
+            }
+
+    def remove_document(self, title: str) -> int:
+        """
+        Remove all Chunks of a Document
+
+        Args:
+            title (str): Document Title (Document ID)
+
+        Returns:
+            int: Number of Chunks Removed
+        """
+        with self.lock:
+            with self.rw_lock.read():
+                ids = self.ids[self.documents.document_rows(title)]
+            return self.remove_ids(ids)
+
+    def replace_document(
+        self,
+        title: str,
+        documents: List[str],
+        chunks: List[str],
+        get_embeddings: Callable[[List[int]], np.ndarray],
+    ) -> Dict[str, int]:
+        """
+        Replace the Chunks of a Document, Keeping Unchanged Ones
+
+        Chunks are matched on their text, so an edit only removes and adds
+        the chunks it changed. Kept chunks that moved are relabeled in
+        place, their vectors and IDs stay. Texts are compared as given and
+        as stored, never parsed back out of labels.
+
+        Args:
+            title (str): Document Title (Document ID)
+            documents (List[str]): New Chunks with Titles, in Order
+            chunks (List[str]): Text of each New Chunk, without Title
+            get_embeddings (Callable[[List[int]], np.ndarray]): Embeddings
+                for the Given Positions in documents, only Called for New
+                Chunks
+
+        Returns:
+            Dict[str, int]: Number of Chunks kept, added and removed
+        """
+        with self.lock:
+            # Existing Chunk IDs per Chunk Text
+            existing = {}
+            with self.rw_lock.read():
+                for row in self.documents.document_rows(title):
+                    existing.setdefault(self.documents.text(row), []).append(
+                        int(self.ids[row])
+                    )
+
+            new_rows = []
+            for row, (document, chunk) in enumerate(zip(documents, chunks)):
+                ids = existing.get(chunk)
+                if ids:
+                    with self.rw_lock.write():
+                        self.documents[self.rows_for_ids(ids.pop(0))] = document
+                else:
+                    new_rows.append(row)
+
+            self.update_titles()
+
+            stale = [idx for ids in existing.values() for idx in ids]
+            removed = self.remove_ids(stale)
+            if new_rows:
+                self.add_documents(
+                    [documents[row] for row in new_rows], get_embeddings(new_rows)
+                )
+
+        return {
+            "kept": len(documents) - len(new_rows),
+            "added": len(new_rows),
+            "removed": removed,
+        }
+
+    def update_titles(self):
+        """
+        Recompute the Indexed Titles, Called after Chunks Change
+        """
+        with self.rw_lock.read():
+            title_ids = np.unique(self.documents.title)
+            titles = self.documents.titles
+            self.titles = frozenset(titles[idx] for idx in title_ids if idx >= 0)
+
+    def has_document(self, title: str) -> bool:
+        """
+        Check if a Document has Chunks in the Index
+
+        Reads the title set without locking, so it never waits for an
+        update and can be called on the event loop.
+
+        Args:
+            title (str): Document Title (Document ID)
+
+        Returns:
+            bool: True if Indexed
+        """
+        return title in self.titles
+
+    def search_document(
+        self, query_embeddings: np.ndarray, k: int, title: str
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact Search within One Document
+
+        The document's vectors are read back from the index by ID and
+        searched directly, so the cost grows with the document, not the
+        corpus. Projected or quantized vectors are compared as stored.
+
+        Args:
+            query_embeddings (np.ndarray): (n, dimension) Query Embeddings
+            k (int): Number of Chunks to Return per Query
+            title (str): Document Title (Document ID)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (n, k) Distances and Chunk IDs,
+                Padded with -1 like index.search
+        """
+        distances = np.full((len(query_embeddings), k), np.inf, dtype=np.float32)
+        indices = np.full((len(query_embeddings), k), -1, dtype=np.int64)
+
+        ids = self.ids[self.documents.document_rows(title)]
+        if len(ids) == 0:
+            return distances, indices
+
+        vectors = self.index.reconstruct_batch(ids)
+        found = min(k, len(ids))
+        distances[:, :found], rows = faiss.knn(query_embeddings, vectors, found)
+        indices[:, :found] = ids[rows]
+
+        return distances, indices
+
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        k: int,
+        documents: List[Optional[str]] = None,
+    ) -> List[List[SearchResult]]:
+        """
+        Search Vector Store via FAISS for Many Queries in One Call
+
+        Args:
+            query_embeddings (np.ndarray): (n, dimension) Query Embeddings
+            k (int): Number of Chunks to Return per Query
+            documents (List[Optional[str]], optional): Document Title to
+                Search within per Query, None Searches all Documents.
+                Defaults to None.
+
+        Returns:
+            List[List[SearchResult]]: Hits per Query, Nearest First
+        """
+        query_embeddings = np.ascontiguousarray(
+            np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        )
+
+        with self.rw_lock.read():
+            if self.index is None or self.index.ntotal == 0:
+                return [[] for _ in query_embeddings]
+
+            # Queries Grouped by Scope, Unscoped Ones Search the Whole Index
+            scopes = {}
+            for row, title in enumerate(documents or [None] * len(query_embeddings)):
+                scopes.setdefault(title, []).append(row)
+
+            distances = np.empty((len(query_embeddings), k), dtype=np.float32)
+            indices = np.empty((len(query_embeddings), k), dtype=np.int64)
+            for title, rows in scopes.items():
+                if title is None:
+                    distances[rows], indices[rows] = self.index.search(
+                        query_embeddings[rows], k
+                    )
+                else:
+                    distances[rows], indices[rows] = self.search_document(
+                        query_embeddings[rows], k, title
+                    )
+
+            # FAISS Pads with -1 when Fewer than k Vectors Match
+            return [
+                [
+                    SearchResult(
+                        int(idx),
+                        float(distance),
+                        self.documents[self.rows_for_ids(idx)],
+                    )
+                    for distance, idx in zip(row_distances, row_indices)
+                    if idx >= 0
+                ]
+                for row_distances, row_indices in zip(distances, indices)
+            ]
+
+    def search(
+        self, query_embedding: np.ndarray, k: int, document: str = None
+    ) -> List[str]:
         """
         Search Vector Store via FAISS for Query
 
         Args:
             query_embedding (np.ndarray): Embedding for Query
             k (int): Number of Chunks to Return
+            document (str, optional): Document Title to Search within.
+                Defaults to None, all Documents.
 
         Returns:
             List[str]: List of Chunks
         """
-        query_embedding = query_embedding.astype(np.float32).reshape(1, -1)
-
-        distances, indices = self.index.search(query_embedding.reshape(1, -1), k)
-
-        return [self.documents[i] for i in indices[0]]
+        return [
+            result.text
+            for result in self.search_batch(query_embedding, k, [document])[0]
+        ]
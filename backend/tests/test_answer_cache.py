@@ -0,0 +1,44 @@
+# tests/test_answer_cache.py
+import numpy as np
+
+from src.answer_cache import AnswerCache, context_key
+
+
+def test_answer_cache_similar_query_same_context():
+    cache = AnswerCache(max_size=2, threshold=0.95)
+    key = context_key([1, 2], ["chunk one", "chunk two"])
+
+    cache.put(np.array([1.0, 0.0, 0.0]), key, "Cached answer")
+
+    assert cache.get(np.array([0.99, 0.05, 0.0]), key) == "Cached answer"
+    assert cache.get(np.array([0.0, 1.0, 0.0]), key) is None
+
+    # Same Question after an Upload Changed the Retrieved Chunks, or Later
+    # in a Conversation
+    new_key = context_key([1, 7], ["chunk one", "new chunk"])
+    assert cache.get(np.array([1.0, 0.0, 0.0]), new_key) is None
+    history = [{"role": "user", "content": "Earlier question"}]
+    history_key = context_key([1, 2], ["chunk one", "chunk two"], history)
+    assert cache.get(np.array([1.0, 0.0, 0.0]), history_key) is None
+
+    # A Different Key does not Evict the Answer
+    assert cache.get(np.array([1.0, 0.0, 0.0]), key) == "Cached answer"
+
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 3
+
+
+def test_answer_cache_lru_and_persistence(tmp_path):
+    cache = AnswerCache(max_size=2, directory=str(tmp_path), signature={"m": "a"})
+    for i, embedding in enumerate(np.eye(3)):
+        cache.put(embedding, f"key{i}", f"answer{i}")
+
+    assert len(cache) == 2
+    assert cache.get(np.eye(3)[0], "key0") is None
+    cache.save()
+
+    reloaded = AnswerCache(max_size=2, directory=str(tmp_path), signature={"m": "a"})
+    assert reloaded.get(np.eye(3)[2], "key2") == "answer2"
+
+    other_model = AnswerCache(directory=str(tmp_path), signature={"m": "b"})
+    assert len(other_model) == 0
@@ -0,0 +1,30 @@
+# tests/test_batcher.py
+import asyncio
+
+from src.batcher import QueryBatcher
+
+
+class CountingRetriever:
+    def __init__(self):
+        self.batches = []
+
+    def retrieve_batch(self, queries, k, documents=None):
+        self.batches.append(list(queries))
+        return [[f"{query}_{i}" for i in range(k)] for query in queries]
+
+
+def test_query_batcher_batches_concurrent_queries():
+    retriever = CountingRetriever()
+    batcher = QueryBatcher(retriever, k=2, max_batch_size=4, max_wait_ms=50)
+
+    async def run():
+        queries = [f"query {i}" for i in range(8)]
+        return queries, await asyncio.gather(*(batcher.retrieve(q) for q in queries))
+
+    queries, results = asyncio.run(run())
+
+    for query, result in zip(queries, results):
+        assert result == [f"{query}_0", f"{query}_1"]
+
+    assert len(retriever.batches) == 2
+    assert all(len(batch) == 4 for batch in retriever.batches)
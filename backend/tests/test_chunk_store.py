@@ -0,0 +1,40 @@
+# tests/test_chunk_store.py
+from src.chunk_store import ChunkStore
+
+
+def test_chunk_store(tmp_path):
+    labels = [
+        "Dracula_Chunk_1: Listen to them, the children of the night.",
+        "Dracula_Chunk_2: Welcome to my house!",
+        "Emma_Chunk_1: Emma Woodhouse, handsome, clever, and rich…",
+        "no title",
+    ]
+
+    store = ChunkStore()
+    store.extend(labels)
+
+    assert store == labels
+    assert store.titles == ["Dracula", "Emma"]
+    assert list(store.document_rows("Dracula")) == [0, 1]
+
+    store[1] = "Dracula_Chunk_3: Welcome to my house!"
+    store.keep([1, 2, 3])
+    store.save(str(tmp_path))
+
+    loaded = ChunkStore.load(str(tmp_path))
+    assert loaded == ["Dracula_Chunk_3: Welcome to my house!"] + labels[2:]
+
+    # Added After the Memory-Mapped Blob
+    loaded.extend(["Emma_Chunk_2: Mr. Knightley."])
+    assert loaded[-1] == "Emma_Chunk_2: Mr. Knightley."
+    assert list(loaded.document_rows("Emma")) == [1, 3]
+
+    # Replaced and Dropped Text Leaves the In-Memory Tail
+    loaded.extend(["Emma_Chunk_3: Badly done, Emma!"])
+    loaded[-1] = "Emma_Chunk_3: Badly done!"
+    loaded.keep([0, 1, 2, 4])
+    assert loaded.dead_bytes > 0
+    loaded.compact(min_dead_bytes=0)
+    assert bytes(loaded.tail) == "Badly done!".encode("utf-8")
+    assert loaded[-1] == "Emma_Chunk_3: Badly done!"
+    assert loaded[:3] == ["Dracula_Chunk_3: Welcome to my house!"] + labels[2:]
@@ -0,0 +1,43 @@
+# tests/test_chunker.py
+from src.chunker import Chunker
+
+
+def test_chunker_packs_to_token_budget(setup_environment, tmp_path):
+    model_id, _, _, huggingface_api_key = setup_environment
+    chunker = Chunker(model_id, huggingface_api_key, target_tokens=16)
+
+    text = (
+        "Hi. Yes. No. "
+        "The Count greeted his guest at the door of the old castle. "
+        + "word " * 40
+        + "Good night."
+    )
+    chunks = list(chunker.chunk([text[:20], text[20:]]))
+
+    assert all(chunk.tokens <= 16 for chunk, _ in chunks)
+    assert all(text[chunk.start : chunk.end] == part for chunk, part in chunks)
+    # Short Sentences are Packed Together, a Long One is Split
+    assert chunks[0][1] == "Hi. Yes. No."
+    assert len(chunks) > 3
+
+    path = tmp_path / "Notes.txt"
+    path.write_text(text)
+    manifests = str(tmp_path / "manifests")
+    assert list(chunker.chunk_file(str(path), manifests)) == chunks
+
+    # Second Run is Sliced from the Manifest
+    chunker.count_tokens = None
+    assert list(chunker.chunk_file(str(path), manifests)) == chunks
+
+
+def test_chunker_overlap(setup_environment):
+    model_id, _, _, huggingface_api_key = setup_environment
+    chunker = Chunker(model_id, huggingface_api_key, target_tokens=24, overlap_tokens=8)
+
+    sentences = [f"Sentence number {n} is here." for n in range(8)]
+    chunks = [part for _, part in chunker.chunk([" ".join(sentences)])]
+
+    # Each Chunk Starts with the Last Sentence of the Previous One
+    assert len(chunks) > 2
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.startswith(previous.split(". ")[-1].rstrip("."))
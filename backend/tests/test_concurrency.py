@@ -0,0 +1,77 @@
+# tests/test_concurrency.py
+import asyncio
+import threading
+
+import pytest
+
+from src.concurrency import (
+    AsyncLimiter,
+    BoundedExecutor,
+    QueueFullError,
+    ReadWriteLock,
+)
+
+
+def test_bounded_executor_rejects_when_full():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = executor.submit(release.wait)
+    queued = executor.submit(lambda: "queued")
+
+    with pytest.raises(QueueFullError):
+        executor.submit(lambda: "rejected")
+
+    release.set()
+    assert running.result() is True
+    assert queued.result() == "queued"
+
+    # Slots are Freed Once Jobs Finish
+    assert executor.submit(lambda: "accepted").result() == "accepted"
+    executor.shutdown()
+
+
+def test_async_limiter_rejects_when_full():
+    limiter = AsyncLimiter("test", max_concurrency=1, max_queue=1)
+
+    async def hold(event):
+        async with limiter:
+            await event.wait()
+
+    async def run():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(release)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFullError):
+            async with limiter:
+                pass
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert limiter.pending == 0
+
+    asyncio.run(run())
+
+
+def test_read_write_lock():
+    lock = ReadWriteLock()
+    events = []
+
+    def write():
+        with lock.write():
+            events.append("write")
+
+    with lock.read():
+        # Readers Share the Lock
+        with lock.read():
+            pass
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join(timeout=0.1)
+        assert writer.is_alive()
+        events.append("read done")
+
+    writer.join(timeout=1)
+    assert events == ["read done", "write"]
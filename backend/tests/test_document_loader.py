@@ -3,7 +3,9 @@ import os
 
 import pytest
 
-from src.document_loader import DocumentLoader
+from nltk.tokenize import sent_tokenize
+
+from src.document_loader import DocumentLoader, iter_sentence_spans, iter_sentences
 
 TEST_FILES = {
     "file_one.txt": "This is the first document.",
@@ -38,3 +40,18 @@ def test_load_documents(test_dir):
 
     assert set(titles_actual) == set(titles_expected)
     assert set(documents_actual) == set(documents_expected)
+
+
+def test_iter_sentences_across_blocks():
+    text = (
+        "Mr. Harker arrived at the castle. It was late! "
+        "The Count greeted him at the door? He did."
+    )
+    blocks = [text[i : i + 7] for i in range(0, len(text), 7)]
+
+    sentences = list(iter_sentences(iter(blocks)))
+
+    assert sentences == sent_tokenize(text)
+    assert [
+        text[start:end] for start, end, _ in iter_sentence_spans(iter(blocks))
+    ] == sentences
@@ -0,0 +1,56 @@
+# tests/test_embedding_store.py
+import os
+
+import numpy as np
+
+from src.embedding_store import EmbeddingStore
+
+
+def test_embedding_store_append_and_reload(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    first = np.random.rand(3, 4).astype(np.float32)
+    store.append(["a", "b", "c"], first)
+
+    second = np.random.rand(2, 4).astype(np.float32)
+    store.append(["c", "d"], second)
+
+    assert len(store) == 4
+    assert np.array_equal(store.get(["d", "a"]), np.stack([second[1], first[0]]))
+
+    # Appends Only Grow the Matrix File
+    assert os.path.getsize(store.matrix_path) == 4 * 4 * 4
+
+    reloaded = EmbeddingStore(str(tmp_path))
+    assert isinstance(reloaded.matrix, np.memmap)
+    assert np.array_equal(reloaded.get(["a", "b", "c"]), first)
+
+
+def test_embedding_store_rejects_other_signature(tmp_path):
+    store = EmbeddingStore(str(tmp_path), signature={"model_id": "model-a"})
+    store.append(["a"], np.ones((1, 4), dtype=np.float32))
+
+    reloaded = EmbeddingStore(str(tmp_path), signature={"model_id": "model-b"})
+    assert len(reloaded) == 0
+    assert "a" not in reloaded
+
+    reloaded.append(["a"], np.zeros((1, 8), dtype=np.float32))
+    assert reloaded.get(["a"]).shape == (1, 8)
+
+
+def test_embedding_store_precision(tmp_path):
+    embeddings = np.random.rand(3, 64).astype(np.float32) - 0.5
+
+    for precision, atol in (("float16", 1e-3), ("int8", 1e-2)):
+        store = EmbeddingStore(str(tmp_path / precision), precision=precision)
+        store.append(["a", "b", "c"], embeddings)
+
+        reloaded = EmbeddingStore(str(tmp_path / precision), precision=precision)
+        assert reloaded.get(["a", "b", "c"]).dtype == np.float32
+        assert np.allclose(reloaded.get(["a", "b", "c"]), embeddings, atol=atol)
+
+    # Smaller Rows on Disk
+    assert os.path.getsize(store.matrix_path) == 3 * (4 + 64)
+
+    # A Cache Written in Another Precision is Discarded, with its Matrix
+    assert len(EmbeddingStore(str(tmp_path / "int8"))) == 0
+    assert not os.path.exists(store.matrix_path)
@@ -4,6 +4,7 @@ import os
 import numpy as np
 
 from src.embeddings import Embeddings
+from src.inference import cosine_agreement
 
 
 def test_get_embeddings(setup_environment, get_document_loader):
@@ -25,3 +26,84 @@ def test_get_embeddings(setup_environment, get_document_loader):
         assert np.allclose(
             embedding, expected_embeddings, atol=1e-4
         ), f"Embeddings for {title} do not match"
+
+
+def test_encode_batched_matches_single(setup_environment):
+    model_id, _, _, huggingface_api_key = setup_environment
+
+    embeddings = Embeddings(model_id=model_id, HUGGINGFACE_API_KEY=huggingface_api_key)
+
+    texts = [
+        "Short chunk.",
+        "This is a somewhat longer chunk of text for padding.",
+        "Medium length chunk here.",
+    ]
+
+    batched = embeddings.encode(texts, batch_size=3)
+    single = embeddings.encode(texts, batch_size=1)
+
+    assert batched.shape == (len(texts), embeddings.model.config.hidden_size)
+    assert np.allclose(batched, single, atol=1e-4)
+
+
+def test_chunk_key_is_content_and_model_keyed(setup_environment):
+    model_id, _, _, huggingface_api_key = setup_environment
+
+    embeddings = Embeddings(model_id=model_id, HUGGINGFACE_API_KEY=huggingface_api_key)
+
+    key = embeddings.chunk_key("Same text.")
+    assert key == embeddings.chunk_key("Same text.")
+    assert key != embeddings.chunk_key("Edited text.")
+
+    embeddings.model_id = "other/model"
+    assert key != embeddings.chunk_key("Same text.")
+
+
+def test_get_embeddings_query_memoized(setup_environment):
+    model_id, _, _, huggingface_api_key = setup_environment
+
+    embeddings = Embeddings(model_id=model_id, HUGGINGFACE_API_KEY=huggingface_api_key)
+    encoded = []
+    encode = embeddings.encode
+    embeddings.encode = lambda texts: encoded.append(list(texts)) or encode(texts)
+
+    first = embeddings.get_embeddings_query(["What is Dracula about?"])
+    second = embeddings.get_embeddings_query(
+        ["  What is  Dracula about? ", "Who is Mina?"]
+    )
+
+    assert encoded == [["What is Dracula about?"], ["Who is Mina?"]]
+    assert np.array_equal(first[0], second[0])
+    assert embeddings.query_cache.stats()["hits"] == 1
+
+
+def test_encode_cls_pooling_normalized(setup_environment):
+    model_id, _, _, huggingface_api_key = setup_environment
+
+    embeddings = Embeddings(
+        model_id=model_id,
+        HUGGINGFACE_API_KEY=huggingface_api_key,
+        pooling="cls",
+        normalize=True,
+    )
+
+    encoded = embeddings.encode(["First chunk.", "A second, longer chunk of text."])
+
+    assert np.allclose(np.linalg.norm(encoded, axis=1), 1.0, atol=1e-5)
+    assert embeddings.signature["pooling"] == "cls"
+    assert embeddings.signature["normalize"] is True
+
+
+def test_int8_backend_agrees_with_fp32(setup_environment):
+    model_id, _, _, huggingface_api_key = setup_environment
+    texts = ["What is the main theme of Dracula?", "Short chunk."]
+
+    baseline = Embeddings(model_id=model_id, HUGGINGFACE_API_KEY=huggingface_api_key)
+    quantized = Embeddings(
+        model_id=model_id,
+        HUGGINGFACE_API_KEY=huggingface_api_key,
+        backend="torch_int8",
+    )
+
+    agreement = cosine_agreement(baseline.encode(texts), quantized.encode(texts))
+    assert min(agreement) >= 0.99
@@ -0,0 +1,139 @@
+# tests/test_ingest.py
+import json
+import os
+
+import numpy as np
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+from src.document_loader import DocumentLoader
+from src.embeddings import Embeddings
+from src.ingest import IngestPipeline
+from src.vector_store import VectorStore
+
+load_dotenv()
+
+
+def check_db_responsive():
+    try:
+        psycopg2.connect(
+            dbname=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            host=os.getenv("DB_HOST"),
+            port=os.getenv("DB_PORT"),
+            connect_timeout=2,
+        ).close()
+        return bool(os.getenv("DB_NAME"))
+    except psycopg2.Error:
+        return False
+
+
+def test_ingest_pipeline_matches_and_resumes(setup_environment, tmp_path):
+    model_id, document_directory, _, huggingface_api_key = setup_environment
+    loader = DocumentLoader(document_directory)
+
+    embeddings = Embeddings(model_id=model_id, HUGGINGFACE_API_KEY=huggingface_api_key)
+    pipeline = IngestPipeline(
+        embeddings, str(tmp_path / "chunks"), str(tmp_path / "embeddings"), workers=2
+    )
+    pipeline.run(loader.paths())
+
+    titles, documents = zip(*sorted(zip(*loader.load_documents())))
+    expected, labels = embeddings.get_embeddings(
+        titles, documents, embedding_directory=str(tmp_path / "serial")
+    )
+    assert pipeline.labels == labels
+    assert np.allclose(pipeline.store.get(pipeline.keys), expected, atol=1e-4)
+
+    # Finished Documents are not Read or Embedded Again
+    resumed = IngestPipeline(
+        embeddings, str(tmp_path / "chunks"), str(tmp_path / "embeddings")
+    )
+    resumed.run(loader.paths())
+    assert resumed.labels == labels
+    assert resumed.resumed == len(titles)
+    assert resumed.stats["read"]["documents"] == 0
+
+    # Records Keep Keys, not Chunk Text
+    record = json.loads(next((tmp_path / "chunks").glob("*.json")).read_text())
+    assert "labels" not in record and record["chunks"] == len(record["keys"])
+
+
+def test_ingest_pipeline_update(setup_environment, tmp_path):
+    model_id, _, _, huggingface_api_key = setup_environment
+    path = tmp_path / "Notes.txt"
+    path.write_text("One fish. Two fish. Red fish. Blue fish. Old fish. New fish.")
+
+    embeddings = Embeddings(
+        model_id=model_id, HUGGINGFACE_API_KEY=huggingface_api_key, chunk_tokens=12
+    )
+    pipeline = IngestPipeline(
+        embeddings, str(tmp_path / "chunks"), str(tmp_path / "embeddings")
+    )
+    vector_store = VectorStore(embeddings.dimension)
+
+    assert pipeline.update(vector_store, str(path)) == {
+        "kept": 0,
+        "added": 2,
+        "removed": 0,
+    }
+
+    # Only the Changed Chunk is Replaced
+    path.write_text("One fish. Two fish. Red fish. Blue fish. A little star.")
+    assert pipeline.update(vector_store, str(path)) == {
+        "kept": 1,
+        "added": 1,
+        "removed": 1,
+    }
+    assert vector_store.documents == [
+        "Notes_Chunk_1: One fish. Two fish. Red fish. Blue fish.",
+        "Notes_Chunk_2: A little star.",
+    ]
+
+    assert pipeline.delete(vector_store, str(path)) == 2
+    assert vector_store.index.ntotal == 0
+    assert not path.exists()
+
+
+@pytest.mark.skipif(not check_db_responsive(), reason="Database is not reachable")
+def test_ingest_pipeline_update_db_reload(setup_environment, tmp_path):
+    model_id, _, _, huggingface_api_key = setup_environment
+    DocumentLoader(str(tmp_path), db_mode=True)
+    path = tmp_path / "Ingest_Reload_Test.txt"
+    path.write_text("One fish. Two fish. Red fish. Blue fish. Old fish. New fish.")
+
+    embeddings = Embeddings(
+        model_id=model_id,
+        HUGGINGFACE_API_KEY=huggingface_api_key,
+        db_mode=True,
+        chunk_tokens=12,
+    )
+    pipeline = IngestPipeline(embeddings, str(tmp_path / "chunks"), db_mode=True)
+    vector_store = VectorStore(embeddings.dimension)
+    pipeline.update(vector_store, str(path))
+
+    # New First Chunk, Stored after the Chunks it Precedes
+    path.write_text(
+        "Stars shine brightly over the sea at night tonight. "
+        "One fish. Two fish. Red fish. Blue fish. Old fish. New fish."
+    )
+    assert pipeline.update(vector_store, str(path))["kept"] == 2
+    live = set(vector_store.document_chunks("Ingest Reload Test").values())
+
+    try:
+        # A Restart Rebuilds the Labels Given at Ingest, in Document Order
+        reloaded = [
+            label
+            for labels, _ in embeddings.iter_embeddings_db()
+            for label in labels
+            if label.startswith("Ingest Reload Test_Chunk_")
+        ]
+        assert set(reloaded) == live
+        assert [label.split(":")[0] for label in reloaded] == [
+            f"Ingest Reload Test_Chunk_{idx + 1}" for idx in range(len(reloaded))
+        ]
+        assert reloaded[0].startswith("Ingest Reload Test_Chunk_1: Stars shine")
+    finally:
+        pipeline.delete(vector_store, str(path))
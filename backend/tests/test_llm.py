@@ -1,4 +1,5 @@
-from unittest.mock import Mock, patch
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
 
 from openai.types.chat import ChatCompletion, ChatCompletionMessage
 
@@ -42,7 +43,7 @@ def test_llm_generate(mock_openai, get_llm):
     call_args = mock_client.chat.completions.create.call_args
 
     assert call_args.kwargs["model"] == "LLaMA_CPP"
-    assert len(call_args.kwargs["messages"]) == 3
+    assert len(call_args.kwargs["messages"]) == 2
 
     assert call_args.kwargs["messages"][0] == {
         "role": "system",
@@ -56,3 +57,64 @@ def test_llm_generate(mock_openai, get_llm):
     assert_dict = {"role": "user", "content": "Test prompt"}
 
     assert call_args.kwargs["messages"][1] == assert_dict
+
+
+def test_llm_agenerate(get_llm):
+    mock_message = Mock(spec=ChatCompletionMessage)
+    mock_message.content = "Async response"
+    mock_choice = Mock()
+    mock_choice.message = mock_message
+    mock_completion = Mock(spec=ChatCompletion)
+    mock_completion.choices = [mock_choice]
+
+    llm = get_llm
+    llm.async_client = Mock()
+    llm.async_client.chat.completions.create = AsyncMock(return_value=mock_completion)
+
+    response = asyncio.run(llm.agenerate("Test prompt"))
+
+    assert response == "Async response"
+    assert llm.messages[-1] == {"role": "assistant", "content": "Async response"}
+    llm.async_client.chat.completions.create.assert_awaited_once()
+
+
+def test_llm_generate_stream(get_llm):
+    chunks = []
+    for content in ["Streamed", None, " response"]:
+        chunk = Mock()
+        chunk.choices = [Mock()]
+        chunk.choices[0].delta.content = content
+        chunks.append(chunk)
+
+    llm = get_llm
+    llm.client = Mock()
+    llm.client.chat.completions.create.return_value = iter(chunks)
+
+    tokens = list(llm.generate_stream("Test prompt"))
+
+    assert tokens == ["Streamed", " response"]
+    assert llm.messages[-1] == {"role": "assistant", "content": "Streamed response"}
+    assert llm.client.chat.completions.create.call_args.kwargs["stream"] is True
+
+
+def test_llm_sessions_are_separate_and_bounded(get_llm):
+    mock_completion = Mock(spec=ChatCompletion)
+    mock_choice = Mock()
+    mock_choice.message.content = "x" * 400
+    mock_completion.choices = [mock_choice]
+
+    llm = get_llm
+    llm.conversations.max_history_tokens = 500
+    llm.client = Mock()
+    llm.client.chat.completions.create.return_value = mock_completion
+
+    for turn in range(10):
+        llm.generate(f"Prompt {turn}", session_id="a")
+    llm.generate("Other prompt", session_id="b")
+
+    sent = llm.client.chat.completions.create.call_args_list
+    # System, Four Turns that Fit the Budget, New Prompt
+    assert len(sent[-2].kwargs["messages"]) == 1 + 2 * 4 + 1
+    assert len(sent[-1].kwargs["messages"]) == 2
+    assert llm.conversations.get_history("a")[-2]["content"] == "Prompt 9"
+    assert len(llm.messages) == 1
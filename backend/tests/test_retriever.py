@@ -12,3 +12,19 @@ def test_retrieve(get_vector_store):
     context = retriever.retrieve(query, k=k)
     print(context)
     assert query in context[0]
+
+
+def test_retrieve_batch(get_vector_store):
+    vector_store, embeddings = get_vector_store
+
+    queries = ["This is the first document.", "This is the second document."]
+
+    retriever = Retriever(vector_store, embeddings)
+    results = retriever.retrieve_batch(queries, k=2)
+
+    assert len(results) == len(queries)
+    for query, hits in zip(queries, results):
+        assert len(hits) == 2
+        assert hits[0].distance <= hits[1].distance
+        assert vector_store.documents[hits[0].chunk_id] == hits[0].text
+        assert retriever.retrieve(query, k=2) == [hit.text for hit in hits]
@@ -0,0 +1,22 @@
+# tests/test_ttl_cache.py
+import time
+
+from src.ttl_cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used_and_idle():
+    cache = TTLCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+    expiring = TTLCache(max_size=2, ttl_seconds=0.01)
+    expiring.put("a", 1)
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+    assert len(expiring) == 0
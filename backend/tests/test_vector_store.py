@@ -1,4 +1,8 @@
 # tests/test_vector_store.py
+import faiss
+import numpy as np
+import pytest
+
 from src.vector_store import VectorStore
 
 
@@ -17,3 +21,197 @@ def test_vector_store(get_embeddings):
     assert vector_store.documents == chunked_texts_with_titles
     assert len(results) == k
     assert chunked_texts_with_titles[0] in results
+
+
+def test_vector_store_snapshot(tmp_path):
+    embeddings = np.random.rand(10, 8).astype(np.float32)
+    documents = [f"Doc_Chunk_{i + 1}: text {i}" for i in range(10)]
+
+    vector_store = VectorStore(dimension=8)
+    vector_store.add_documents(documents, embeddings)
+    vector_store.save(str(tmp_path), "fingerprint")
+
+    assert VectorStore.load(str(tmp_path), "other fingerprint") is None
+
+    loaded = VectorStore.load(str(tmp_path), "fingerprint")
+    assert loaded.documents == documents
+    assert loaded.search(embeddings[3], 1) == [documents[3]]
+
+    # Adding to a Memory-Mapped Snapshot Loads it into Memory
+    loaded.add_documents(["Doc_Chunk_11: new"], np.zeros((1, 8), dtype=np.float32))
+    assert loaded.index.ntotal == 11
+
+    # A Save that Fails Partway Leaves no Valid Snapshot
+    def fail(directory):
+        raise OSError("disk full")
+
+    loaded.documents.save = fail
+    with pytest.raises(OSError):
+        loaded.save(str(tmp_path), "fingerprint")
+    assert VectorStore.load(str(tmp_path), "fingerprint") is None
+
+
+def test_vector_store_search_batch():
+    embeddings = np.eye(4, dtype=np.float32)
+    documents = [f"Doc_Chunk_{i + 1}: text {i}" for i in range(4)]
+
+    vector_store = VectorStore(dimension=4)
+    vector_store.add_documents(documents, embeddings)
+
+    results = vector_store.search_batch(embeddings[[2, 0]], k=2)
+
+    assert len(results) == 2
+    assert results[0][0].chunk_id == 2
+    assert results[0][0].distance == 0.0
+    assert results[0][0].text == documents[2]
+    assert results[1][0].chunk_id == 0
+
+    # Fewer Vectors than k
+    assert len(vector_store.search_batch(embeddings[:1], k=10)[0]) == 4
+
+
+def test_vector_store_replace_and_remove_document():
+    for index in ("flat", "hnsw"):
+        embeddings = np.eye(6, dtype=np.float32)
+        documents = [f"A_Chunk_{i + 1}: a{i}" for i in range(3)] + [
+            f"B_Chunk_{i + 1}: b{i}" for i in range(3)
+        ]
+
+        vector_store = VectorStore(dimension=6, index_config={"index": index})
+        vector_store.add_documents(documents, embeddings)
+
+        # a1 Dropped, a2 Moves, a9 is New
+        requested = []
+
+        def get_embeddings(rows):
+            requested.extend(rows)
+            return embeddings[[1]]
+
+        changes = vector_store.replace_document(
+            "A",
+            ["A_Chunk_1: a0", "A_Chunk_2: a2", "A_Chunk_3: a9"],
+            ["a0", "a2", "a9"],
+            get_embeddings,
+        )
+
+        assert changes == {"kept": 2, "added": 1, "removed": 1}
+        assert requested == [2]
+        assert vector_store.index.ntotal == 6
+        assert vector_store.search_batch(embeddings[2], 1)[0][0] == (
+            2,
+            0.0,
+            "A_Chunk_2: a2",
+        )
+        assert vector_store.search(embeddings[1], 1) == ["A_Chunk_3: a9"]
+
+        assert vector_store.remove_document("A") == 3
+        assert vector_store.index.ntotal == 3
+        assert vector_store.documents == documents[3:]
+        assert vector_store.search(embeddings[4], 1) == [documents[4]]
+
+        # Titles and Texts Containing the Label Separator
+        labels = ["Q: A_Chunk_1: x: y", "Q: A_Chunk_2: z"]
+        vector_store.add_documents(labels, embeddings[:2])
+        changes = vector_store.replace_document(
+            "Q: A", ["Q: A_Chunk_1: z", "Q: A_Chunk_2: x: y"], ["z", "x: y"], None
+        )
+        assert changes == {"kept": 2, "added": 0, "removed": 0}
+        assert vector_store.search(embeddings[0], 1) == ["Q: A_Chunk_2: x: y"]
+
+
+def test_vector_store_precision(tmp_path):
+    embeddings = np.random.rand(100, 16).astype(np.float32)
+    documents = [f"Doc_Chunk_{i + 1}: text {i}" for i in range(100)]
+
+    for precision in ("float16", "int8"):
+        vector_store = VectorStore(dimension=16, index_config={"precision": precision})
+        vector_store.add_documents(documents, embeddings)
+        vector_store.save(str(tmp_path / precision), "fingerprint")
+
+        loaded = VectorStore.load(str(tmp_path / precision), "fingerprint")
+        assert loaded.search(embeddings[42], 1) == [documents[42]]
+
+
+def test_vector_store_projection(tmp_path):
+    # 32-d Vectors that Vary in only 8 Directions
+    rng = np.random.default_rng(0)
+    embeddings = (rng.random((300, 8)) @ rng.random((8, 32))).astype(np.float32)
+    documents = [f"Doc_Chunk_{i + 1}: text {i}" for i in range(300)]
+
+    for index in ("flat", "hnsw", "ivf_flat"):
+        vector_store = VectorStore(
+            dimension=32,
+            index_config={
+                "index": index,
+                "nlist": 4,
+                "projection": "pca",
+                "projection_dimension": 8,
+            },
+        )
+        vector_store.add_documents(documents, embeddings)
+        vector_store.save(str(tmp_path / index), "fingerprint")
+
+        # Full-Dimension Queries are Projected by the Loaded Index
+        loaded = VectorStore.load(str(tmp_path / index), "fingerprint")
+        projected = faiss.downcast_index(loaded.index)
+        while not isinstance(projected, faiss.IndexPreTransform):
+            projected = faiss.downcast_index(projected.index)
+        assert projected.index.d == 8
+        assert loaded.search(embeddings[42], 1) == [documents[42]]
+
+        assert loaded.remove_ids([42]) == 1
+        assert loaded.search(embeddings[43], 1) == [documents[43]]
+
+
+def test_vector_store_document_scope(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.random((200, 8)).astype(np.float32)
+    documents = [f"A_Chunk_{i + 1}: a{i}" for i in range(100)] + [
+        f"B_Chunk_{i + 1}: b{i}" for i in range(100)
+    ]
+
+    for index in ("flat", "hnsw", "ivf_flat"):
+        vector_store = VectorStore(
+            dimension=8, index_config={"index": index, "nlist": 4}
+        )
+        vector_store.add_documents(documents, embeddings)
+        vector_store.save(str(tmp_path / index), "fingerprint")
+        loaded = VectorStore.load(str(tmp_path / index), "fingerprint")
+
+        # A Chunk of A Searched in B Finds B's Exact Nearest Chunks
+        exact = np.argsort(((embeddings[100:] - embeddings[7]) ** 2).sum(axis=1))
+        scoped, unscoped = loaded.search_batch(embeddings[[7, 7]], 3, ["B", None])
+        assert [hit.chunk_id for hit in scoped] == (100 + exact[:3]).tolist()
+        assert unscoped[0].text == documents[7]
+
+        assert set(loaded.search(embeddings[7], 300, "A")) == set(documents[:100])
+        assert loaded.search(embeddings[7], 3, "C") == []
+        assert loaded.has_document("B") and not loaded.has_document("C")
+
+        # Answered while an Update Holds the Index
+        with loaded.rw_lock.write():
+            assert loaded.has_document("A")
+        loaded.remove_document("A")
+        assert not loaded.has_document("A")
+
+
+def test_vector_store_train():
+    # Two Far Apart Clusters, Streamed One after the Other
+    rng = np.random.default_rng(0)
+    embeddings = rng.random((400, 8)).astype(np.float32)
+    embeddings[200:] += 100
+    documents = [f"Doc_Chunk_{i + 1}: text {i}" for i in range(400)]
+
+    vector_store = VectorStore(
+        dimension=8, index_config={"index": "ivf_flat", "nlist": 4}
+    )
+    vector_store.train(embeddings[::4])
+    for start in range(0, 400, 100):
+        stop = start + 100
+        vector_store.add_documents(documents[start:stop], embeddings[start:stop])
+
+    # Lists Cover the Second Cluster although the First Block had None of it
+    ivf = faiss.extract_index_ivf(vector_store.index)
+    centroids = ivf.quantizer.reconstruct_n(0, ivf.nlist)
+    assert (centroids.mean(axis=1) > 50).any()
+    assert vector_store.search(embeddings[300], 1) == [documents[300]]
@@ -6,3 +6,4 @@ mock_psycopg2 = MagicMock()
 sys.modules["psycopg2"] = mock_psycopg2
 sys.modules["psycopg2.extras"] = mock_psycopg2.extras
 sys.modules["psycopg2.extensions"] = mock_psycopg2.extensions
+sys.modules["psycopg2.pool"] = mock_psycopg2.pool
@@ -1,17 +1,25 @@
 import streamlit as st
 import requests
-from utils import clean_response
+from utils import clean_response, parse_stream
 import base64
+import uuid
 
 st.title("Doc Bot")
 
-query_url = "http://backend:8000/query"
+query_url = "http://backend:8000/query/stream"
 upload_url = "http://backend:8000/upload"
 
 # Create Messages List
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Conversation ID, Keeps this Browser Session's History Separate on the Backend
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
+
+# Optional Document Scope, e.g. "Dracula" or "Dracula.txt"
+document = st.sidebar.text_input("Answer from one document (title or file name)")
+
 # Write Message Content to Interface
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
@@ -23,20 +31,29 @@ if prompt := st.chat_input(""):
     st.session_state.messages.append({"role": "user", "content": prompt})
 
     # Format User Input
-    data = {"text": prompt}
+    data = {"text": prompt, "session_id": st.session_state.session_id}
+    if document:
+        data["document"] = document
 
-    # API Request
-    response = requests.post(query_url, json=data)
+    # API Request, Streamed so Tokens Show as they are Generated
+    response = requests.post(query_url, json=data, stream=True)
 
-    if response.status_code == 200:
-        api_response = response.json()
-        api_response = clean_response(api_response["answer"])
-    else:
-        api_response = f"Error: {response.status_code}, {response.text}"
-
-    # Display the response from the API
     with st.chat_message("assistant"):
-        st.markdown(api_response)
+        if response.status_code == 200:
+            stats = {}
+            api_response = st.write_stream(parse_stream(response.iter_lines(), stats))
+            api_response = clean_response(api_response or "")
+
+            if "error" in stats:
+                st.error(f"Error: {stats['error']}")
+            elif stats:
+                st.caption(
+                    f"First token {stats['time_to_first_token'] or 0:.2f}s, "
+                    f"total {stats['total_time']:.2f}s"
+                )
+        else:
+            api_response = f"Error: {response.status_code}, {response.text}"
+            st.markdown(api_response)
 
     # Append to Message List
     st.session_state.messages.append({"role": "assistant", "content": api_response})
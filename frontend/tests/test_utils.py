@@ -1,4 +1,4 @@
-from utils import clean_response
+from utils import clean_response, parse_stream
 
 
 def test_clean_response():
@@ -25,3 +25,18 @@ def test_clean_response():
     response = "<p>Multiple </s> tags </p> and </s> HTML"
     cleaned_response = clean_response(response)
     assert cleaned_response == "Multiple tags and HTML"
+
+
+def test_parse_stream():
+    lines = [
+        b'{"token": "Hello"}',
+        b"",
+        b'{"token": " world</s>"}',
+        b'{"done": true, "time_to_first_token": 0.5, "total_time": 2.0}',
+    ]
+    stats = {}
+
+    tokens = list(parse_stream(lines, stats))
+
+    assert tokens == ["Hello", " world"]
+    assert stats == {"time_to_first_token": 0.5, "total_time": 2.0}
@@ -1,4 +1,6 @@
+import json
 import re
+from typing import Iterable, Iterator
 
 
 def clean_response(response: str) -> str:
@@ -22,3 +24,31 @@ def clean_response(response: str) -> str:
     response = response.replace("  ", " ")
 
     return response
+
+
+def parse_stream(lines: Iterable[bytes], stats: dict) -> Iterator[str]:
+    """
+    Parse Streamed NDJSON Answer into Tokens
+    Args:
+        lines (Iterable[bytes]): Response lines from /query/stream.
+        stats (dict): Filled with time_to_first_token and total_time
+            (seconds) from the final line, or error if the stream failed.
+
+    Yields:
+        str: Answer tokens, with end of sequence tags removed.
+    """
+    for line in lines:
+        if not line:
+            continue
+
+        message = json.loads(line)
+
+        if "token" in message:
+            token = message["token"].replace("</s>", "")
+            if token:
+                yield token
+        elif "error" in message:
+            stats["error"] = message["error"]
+        elif message.get("done"):
+            stats["time_to_first_token"] = message["time_to_first_token"]
+            stats["total_time"] = message["total_time"]